@@ -0,0 +1,89 @@
+import functools
+import re
+import chess
+import chess.svg
+from PySide6.QtCore import QByteArray, QMimeData, Qt
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtSvg import QSvgRenderer
+
+# Markup QtSvg never draws: the ASCII board in <desc>, CSS classes (no stylesheet is
+# emitted) and the SVG2 href that chess.svg writes next to every xlink:href
+_UNDRAWN_RE = re.compile(r'<desc>.*?</desc>| class="[^"]*"| href="#[^"]*"(?= xlink:href)', re.S)
+
+def compact_svg(svg_str):
+    """
+    @brief Shrink chess.svg output before it is parsed by QtSvg.
+    @param svg_str SVG text.
+    @return SVG text with undrawn markup removed and no newlines; what QtSvg draws is unchanged.
+    """
+    return _UNDRAWN_RE.sub('', svg_str).replace('\n', ' ').replace(' />', '/>')
+
+@functools.lru_cache(maxsize=256)
+def render_board_svg(board_fen, orientation, check=None, arrows_key=(), lastmove=None, size=None, squares_key=()):
+    """
+    @brief Render and encode a board SVG, memoized on everything that affects the image.
+    @param board_fen Piece placement part of the FEN.
+    @param orientation chess.WHITE or chess.BLACK.
+    @param check Square of the king in check, or None.
+    @param arrows_key Tuple of (tail, head, color) tuples.
+    @param lastmove chess.Move to highlight, or None.
+    @param size Pixel size baked into the SVG, or None for chess.svg's default.
+    @param squares_key Tuple of squares chess.svg marks with an X.
+    @return QByteArray holding the UTF-8 SVG. Callers must not modify it.
+    """
+    svg_str = chess.svg.board(
+        chess.BaseBoard(board_fen),
+        orientation=orientation,
+        check=check,
+        lastmove=lastmove,
+        size=size,
+        arrows=[chess.svg.Arrow(tail, head, color=color) for tail, head, color in arrows_key],
+        squares=squares_key
+    )
+    return QByteArray(compact_svg(svg_str).encode("utf-8"))
+
+# (piece symbol, size) -> QPixmap, shared by every board and dialog
+_PIECE_PIXMAPS = {}
+
+def piece_pixmap(symbol, size):
+    """
+    @brief Get a piece image rasterized straight at the requested size, cached per process.
+    @param symbol Piece symbol, e.g. 'Q' or 'n'.
+    @param size Edge length in pixels.
+    @return Transparent QPixmap of the piece.
+    """
+    key = (symbol, size)
+    pixmap = _PIECE_PIXMAPS.get(key)
+    if pixmap is None:
+        piece_svg = chess.svg.piece(chess.Piece.from_symbol(symbol), size=size)
+        renderer = QSvgRenderer(QByteArray(piece_svg.encode("utf-8")))
+        pixmap = QPixmap(size, size)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        renderer.render(painter)
+        painter.end()
+        _PIECE_PIXMAPS[key] = pixmap
+    return pixmap
+
+# MIME type of a piece dragged between squares; payload is the origin square index
+SQUARE_MIME_TYPE = "application/x-chess-square"
+
+def square_mime_data(square):
+    """
+    @brief Wrap a drag's origin square for QDrag.setMimeData.
+    @param square Origin square index (0-63).
+    @return QMimeData carrying the square as one byte.
+    """
+    mime_data = QMimeData()
+    mime_data.setData(SQUARE_MIME_TYPE, QByteArray(bytes([square])))
+    return mime_data
+
+def dropped_square(mime_data):
+    """
+    @brief Read the origin square of a piece drag.
+    @param mime_data The drop event's QMimeData.
+    @return Square index, or None if the drop is not a piece from a board (e.g. dragged text).
+    """
+    if not mime_data.hasFormat(SQUARE_MIME_TYPE):
+        return None
+    return bytes(mime_data.data(SQUARE_MIME_TYPE))[0]
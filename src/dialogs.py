@@ -1,6 +1,6 @@
 from PySide6.QtWidgets import *
 from PySide6.QtCore import QSettings, Qt, Signal, QThread
-from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtGui import QIcon
 import os
 import chess.pgn
 import io
@@ -8,10 +8,32 @@ import re
 import polars as pl
 import requests
 import sys
+import threading
 from huggingface_hub import hf_hub_download
+from board_svg import piece_pixmap
 
 OPENINGS_LOADED_FLAG = False
 OPENINGS_DB = []  # Initialize as empty list instead of loading immediately
+OPENINGS_BY_MOVES = {}  # Space-separated SAN moves -> opening, built by load_openings
+OPENINGS_MAX_MOVES = 0  # Length of the longest opening line
+
+# Install-relative dataset folder, resolved once at import
+APP_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
+DATASETS_DIR = os.path.join(APP_DIR, "datasets")
+OPENINGS_FILE = os.path.join(DATASETS_DIR, "data", "train-00000-of-00001.parquet")
+_OPENINGS_LOCK = threading.Lock()
+
+_APP_ICON = None
+
+def app_icon():
+    """
+    @brief Get the window icon, loaded from disk on first use and shared by every window.
+    @return QIcon of img/king.ico.
+    """
+    global _APP_ICON
+    if _APP_ICON is None:
+        _APP_ICON = QIcon("./img/king.ico")
+    return _APP_ICON
 
 def clean_pgn_moves(pgn_str):
         """Remove move numbers and periods from a PGN string."""
@@ -19,45 +41,117 @@ def clean_pgn_moves(pgn_str):
         moves = [token for token in tokens if not re.match(r"^\d+\.$", token)]
         return " ".join(moves)
 
+def iter_pgn_games(pgn_content):
+    """
+    @brief Yield the games of a PGN text one at a time, without parsing their moves.
+    @param pgn_content PGN text holding any number of games.
+    @return Generator of (headers, game text) pairs.
+    """
+    handle = io.StringIO(pgn_content)
+    while True:
+        start = handle.tell()
+        # read_headers skips the movetext, so no SAN is parsed just to split the file
+        headers = chess.pgn.read_headers(handle)
+        if headers is None:
+            return
+        yield headers, pgn_content[start:handle.tell()]
+
+def openings_downloaded():
+    """
+    @brief Check whether the openings dataset is on disk, so load_openings needs no download dialog.
+    """
+    return os.path.exists(OPENINGS_FILE)
+
 def load_openings():
-    global OPENINGS_DB, OPENINGS_LOADED_FLAG
-    if len(OPENINGS_DB) > 0:
-        return OPENINGS_DB
+    global OPENINGS_DB, OPENINGS_LOADED_FLAG, OPENINGS_MAX_MOVES
+    # Held for the whole load, so a caller on another thread waits instead of loading twice
+    with _OPENINGS_LOCK:
+        if len(OPENINGS_DB) > 0:
+            return OPENINGS_DB
     
-    # Load the dataset using polars
-    # df = pl.scan_parquet("hf://datasets/Lichess/chess-openings/data/train-00000-of-00001.parquet")
-    abs_pth = os.path.abspath(sys.argv[0])
-    install_dir = os.path.dirname(abs_pth)
-    data_dir = os.path.join(install_dir, "datasets")
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-    if not os.path.exists(os.path.join(data_dir, "data", "train-00000-of-00001.parquet")):
-        start_hf_download(label_txt="Downloading Openings Dataset...", repo_id="Lichess/chess-openings", hf_filename="data/train-00000-of-00001.parquet", local_dir=data_dir)
-    df = pl.scan_parquet(os.path.join(data_dir, "data", "train-00000-of-00001.parquet"))
+        # Load the dataset using polars
+        # df = pl.scan_parquet("hf://datasets/Lichess/chess-openings/data/train-00000-of-00001.parquet")
+        data_dir = DATASETS_DIR
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        if not openings_downloaded():
+            start_hf_download(label_txt="Downloading Openings Dataset...", repo_id="Lichess/chess-openings", hf_filename="data/train-00000-of-00001.parquet", local_dir=data_dir)
+        df = pl.scan_parquet(OPENINGS_FILE)
     
-    # Convert pgn column to string type
-    df = df.with_columns(pl.col("pgn").cast(pl.Utf8))
+        # Convert pgn column to string type
+        df = df.with_columns(pl.col("pgn").cast(pl.Utf8))
     
-    # Apply clean_pgn_moves to create clean_moves column
-    # Use map instead of apply for expressions
-    df = df.with_columns(
-        pl.col("pgn").map_elements(clean_pgn_moves, return_dtype=str).alias("clean_moves")
-    )
+        # Apply clean_pgn_moves to create clean_moves column
+        # Use map instead of apply for expressions
+        df = df.with_columns(
+            pl.col("pgn").map_elements(clean_pgn_moves, return_dtype=str).alias("clean_moves")
+        )
     
-    # Count moves by splitting on whitespace
-    df = df.with_columns(
-        pl.col("clean_moves").map_elements(lambda s: len(s.split()), return_dtype=int).alias("move_count")
-    )
+        # Count moves by splitting on whitespace
+        df = df.with_columns(
+            pl.col("clean_moves").map_elements(lambda s: len(s.split()), return_dtype=int).alias("move_count")
+        )
     
-    # Sort by move count descending
-    df = df.sort("move_count", descending=True)
+        # Sort by move count descending
+        df = df.sort("move_count", descending=True)
 
-    df = df.collect()
+        df = df.collect()
     
-    # Convert to dict format that matches pandas to_dict(orient='records')
-    OPENINGS_DB = df.to_dicts()
-    OPENINGS_LOADED_FLAG = True
-    return OPENINGS_DB
+        # Convert to dict format that matches pandas to_dict(orient='records')
+        OPENINGS_DB = df.to_dicts()
+        # Rows are sorted longest first; the first row for a move sequence wins, as in a linear scan
+        for opening in OPENINGS_DB:
+            OPENINGS_BY_MOVES.setdefault(opening["clean_moves"], opening)
+        OPENINGS_MAX_MOVES = OPENINGS_DB[0]["move_count"] if OPENINGS_DB else 0
+        OPENINGS_LOADED_FLAG = True
+        return OPENINGS_DB
+
+def find_opening(san_moves):
+    """
+    @brief Find the opening whose moves are the longest prefix of a game.
+    @param san_moves List of SAN moves from the start position.
+    @return The opening dict, or None if no opening matches or none are loaded.
+    """
+    for length in range(min(len(san_moves), OPENINGS_MAX_MOVES), 0, -1):
+        opening = OPENINGS_BY_MOVES.get(" ".join(san_moves[:length]))
+        if opening is not None:
+            return opening
+    return None
+
+# Help text explaining the program; static, so built once at import
+HELP_TEXT = (
+    "Welcome to BoardMaster!\n\n"
+    "BoardMaster is a chess game analyzer that leverages the Stockfish engine and the python-chess "
+    "library to provide move-by-move evaluations for chess games loaded in PGN format. "
+    "It provides a rich graphical interface built with PySide6 for navigating through games, "
+    "displaying an evaluation bar, annotated moves, and interactive board controls.\n\n"
+    "Features:\n"
+    "• Load games by pasting PGN text or opening a PGN file\n"
+    "• Split large PGN files containing multiple games into individual files\n"
+    "• Automatic analysis of each move to assess accuracy, identify mistakes, and highlight excellent moves\n"
+    "• A dynamic evaluation bar that reflects the positional advantage based on pre-computed game analysis\n"
+    "• Move navigation controls: first, previous, next, and last move, as well as a board flip option\n"
+    "• Interactive board play for testing positions\n"
+    "• Customizable engine settings including:\n"
+    "  - Analysis depth\n"
+    "  - Number of analysis lines/arrows\n"
+    "  - Engine threads\n"
+    "  - Memory allocation\n"
+    "  - Analysis time per position\n"
+    "  - Analysis time for full games\n"
+    "• Configurable game directory for organizing PGN files\n"
+    "• Visual arrow indicators showing engine suggestions\n\n"
+    "How to Use BoardMaster:\n"
+    "1. Configure your chess engine (e.g. Stockfish) in Settings\n"
+    "2. Load a game by pasting PGN or opening a PGN file\n"
+    "3. Use the PGN Splitter to split large collections into individual game files\n"
+    "4. The game will be automatically analyzed with your configured settings\n"
+    "5. Navigate moves using the control buttons or arrow keys\n"
+    "6. View engine evaluations, arrows, and move annotations\n"
+    "7. Adjust analysis parameters in Settings to balance speed and accuracy\n"
+    "8. Use the board flip button to view the position from either side\n\n"
+    "All settings are automatically saved between sessions. Enjoy analyzing your chess games with BoardMaster!"
+)
 
 class HelpDialog(QDialog):
     def __init__(self, parent=None):
@@ -67,49 +161,15 @@ class HelpDialog(QDialog):
         """
         super().__init__(parent)
         self.setWindowTitle("BoardMaster Help")
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         self.resize(600, 700)
 
         layout = QVBoxLayout(self)
 
-        # Help text explaining the program
-        help_text = (
-            "Welcome to BoardMaster!\n\n"
-            "BoardMaster is a chess game analyzer that leverages the Stockfish engine and the python-chess "
-            "library to provide move-by-move evaluations for chess games loaded in PGN format. "
-            "It provides a rich graphical interface built with PySide6 for navigating through games, "
-            "displaying an evaluation bar, annotated moves, and interactive board controls.\n\n"
-            "Features:\n"
-            "• Load games by pasting PGN text or opening a PGN file\n"
-            "• Split large PGN files containing multiple games into individual files\n"
-            "• Automatic analysis of each move to assess accuracy, identify mistakes, and highlight excellent moves\n"
-            "• A dynamic evaluation bar that reflects the positional advantage based on pre-computed game analysis\n"
-            "• Move navigation controls: first, previous, next, and last move, as well as a board flip option\n"
-            "• Interactive board play for testing positions\n"
-            "• Customizable engine settings including:\n"
-            "  - Analysis depth\n"
-            "  - Number of analysis lines/arrows\n"
-            "  - Engine threads\n"
-            "  - Memory allocation\n"
-            "  - Analysis time per position\n"
-            "  - Analysis time for full games\n"
-            "• Configurable game directory for organizing PGN files\n"
-            "• Visual arrow indicators showing engine suggestions\n\n"
-            "How to Use BoardMaster:\n"
-            "1. Configure your chess engine (e.g. Stockfish) in Settings\n"
-            "2. Load a game by pasting PGN or opening a PGN file\n"
-            "3. Use the PGN Splitter to split large collections into individual game files\n"
-            "4. The game will be automatically analyzed with your configured settings\n"
-            "5. Navigate moves using the control buttons or arrow keys\n"
-            "6. View engine evaluations, arrows, and move annotations\n"
-            "7. Adjust analysis parameters in Settings to balance speed and accuracy\n"
-            "8. Use the board flip button to view the position from either side\n\n"
-            "All settings are automatically saved between sessions. Enjoy analyzing your chess games with BoardMaster!"
-        )
 
         # Using QTextBrowser to allow for rich text or scrolling
         text_browser = QTextBrowser(self)
-        text_browser.setPlainText(help_text)
+        text_browser.setPlainText(HELP_TEXT)
         text_browser.setReadOnly(True)
         layout.addWidget(text_browser)
 
@@ -128,7 +188,7 @@ class SettingsDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Settings")
         self.resize(600, 400)
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         self.settings = QSettings("BoardMaster", "BoardMaster")
         layout = QVBoxLayout(self)
 
@@ -136,7 +196,6 @@ class SettingsDialog(QDialog):
 
         engine_layout = QHBoxLayout()
         self.engine_path = QLineEdit()
-        self.engine_path.setText(self.settings.value("engine/path", "", str))
         self.engine_path.setPlaceholderText("Path to engine executable (e.g. Stockfish)")
         engine_browse = QPushButton("Browse")
         engine_browse.clicked.connect(self.browse_engine)
@@ -146,7 +205,6 @@ class SettingsDialog(QDialog):
 
         games_dir_layout = QHBoxLayout()
         self.games_dir = QLineEdit()
-        self.games_dir.setText(self.settings.value("game_dir", "", str))
         self.games_dir.setPlaceholderText("Path to game directory")
         games_dir_browse = QPushButton("Browse")
         games_dir_browse.clicked.connect(self.browse_game_dir)
@@ -156,7 +214,6 @@ class SettingsDialog(QDialog):
 
         game_analysis_layout = QHBoxLayout()
         self.game_analysis = QLineEdit()
-        self.game_analysis.setText(self.settings.value("game_analysis_dir", "", str))
         self.game_analysis.setPlaceholderText("Path to analysis directory")
         game_analysis_browse = QPushButton("Browse")
         game_analysis_browse.clicked.connect(self.browse_analysis_dir)
@@ -166,66 +223,71 @@ class SettingsDialog(QDialog):
 
         self.thread_spin = QSpinBox()
         self.thread_spin.setRange(1, os.cpu_count())
-        self.thread_spin.setValue(self.settings.value("engine/threads", 4, int))
         layout.addWidget(QLabel("Threads:"))
         layout.addWidget(self.thread_spin)
 
         self.memory_spin = QSpinBox()
         self.memory_spin.setRange(1, 8192)
         self.memory_spin.setSingleStep(16)
-        self.memory_spin.setValue(self.settings.value("engine/memory", 16, int))
         layout.addWidget(QLabel("Memory:"))
         layout.addWidget(self.memory_spin)
 
         self.depth_spin = QSpinBox()
         self.depth_spin.setRange(1, 100)
-        self.depth_spin.setValue(self.settings.value("engine/depth", 20, int))
         layout.addWidget(QLabel("Analysis Depth:"))
         layout.addWidget(self.depth_spin)
 
         self.arrows_spin = QSpinBox()
         self.arrows_spin.setRange(1, 10)
-        self.arrows_spin.setValue(self.settings.value("engine/lines", 3, int))
         layout.addWidget(QLabel("Number of Lines:"))
         layout.addWidget(self.arrows_spin)
 
         self.seconds_input = QDoubleSpinBox()
         self.seconds_input.setRange(0, 5)
         self.seconds_input.setSingleStep(0.1)
-        self.seconds_input.setValue(self.settings.value("analysis/postime", 0.1, float))
         layout.addWidget(QLabel("Time for single position analysis (seconds):"))
         layout.addWidget(self.seconds_input)
 
         self.seconds_input2 = QDoubleSpinBox()
         self.seconds_input2.setRange(0, 5)
         self.seconds_input2.setSingleStep(0.1)
-        self.seconds_input2.setValue(
-            self.settings.value("analysis/fulltime", 0.1, float)
-        )
         layout.addWidget(QLabel("Time for full game analysis (seconds):"))
         layout.addWidget(self.seconds_input2)
 
         self.show_arrows = QCheckBox("Show Analysis Arrows")
-        self.show_arrows.setChecked(
-            self.settings.value("display/show_arrows", True, bool)
-        )
         layout.addWidget(self.show_arrows)
 
         self.arrow_move_toggle = QCheckBox("Show arrows for move ahead")
-        self.arrow_move_toggle.setChecked(
-            self.settings.value("display/arrow_move", True, bool)
-        )
         layout.addWidget(self.arrow_move_toggle)
 
         self.load_openings_toggle = QCheckBox("Load openings on application start")
-        self.load_openings_toggle.setChecked(
-            self.settings.value("game/load_openings", True, bool)
-        )
         layout.addWidget(self.load_openings_toggle)
 
+        self.pretty_json_toggle = QCheckBox("Pretty-print saved analysis files")
+        layout.addWidget(self.pretty_json_toggle)
+
         save_button = QPushButton("Save")
         save_button.clicked.connect(self.save_settings)
         layout.addWidget(save_button)
+        self.reset()
+
+    def reset(self):
+        """
+        @brief Load the saved settings into the widgets, dropping unsaved edits.
+        """
+        self.engine_path.setText(self.settings.value("engine/path", "", str))
+        self.games_dir.setText(self.settings.value("game_dir", "", str))
+        self.game_analysis.setText(self.settings.value("game_analysis_dir", "", str))
+        self.thread_spin.setValue(self.settings.value("engine/threads", 4, int))
+        self.memory_spin.setValue(self.settings.value("engine/memory", 16, int))
+        self.depth_spin.setValue(self.settings.value("engine/depth", 20, int))
+        self.arrows_spin.setValue(self.settings.value("engine/lines", 3, int))
+        self.seconds_input.setValue(self.settings.value("analysis/postime", 0.1, float))
+        self.seconds_input2.setValue(self.settings.value("analysis/fulltime", 0.1, float))
+        self.show_arrows.setChecked(self.settings.value("display/show_arrows", True, bool))
+        self.arrow_move_toggle.setChecked(self.settings.value("display/arrow_move", True, bool))
+        self.load_openings_toggle.setChecked(self.settings.value("game/load_openings", True, bool))
+        self.pretty_json_toggle.setChecked(self.settings.value("analysis/pretty_json", False, bool))
 
     def browse_engine(self):
         """
@@ -279,7 +341,8 @@ class SettingsDialog(QDialog):
         self.settings.setValue("game_dir", self.games_dir.text())
         self.settings.setValue("game_analysis_dir", self.game_analysis.text())
         self.settings.setValue("game/load_openings", self.load_openings_toggle.isChecked())
-        self.parent().engine = self.parent().initialize_engine()
+        self.settings.setValue("analysis/pretty_json", self.pretty_json_toggle.isChecked())
+        self.parent().apply_engine_settings()
         self.accept()
 
 class PGNSplitterDialog(QDialog):
@@ -290,7 +353,7 @@ class PGNSplitterDialog(QDialog):
         """
         super().__init__(parent)
         self.setWindowTitle("PGN Splitter")
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         self.setMinimumSize(600, 400)
         
         layout = QVBoxLayout(self)
@@ -302,8 +365,9 @@ class PGNSplitterDialog(QDialog):
         )
         layout.addWidget(instructions)
         
-        # Text area for PGN input
-        self.pgn_text = QTextEdit()
+        # Text area for PGN input; plain text without wrapping lays out multi-MB files quickly
+        self.pgn_text = QPlainTextEdit()
+        self.pgn_text.setLineWrapMode(QPlainTextEdit.NoWrap)
         self.pgn_text.setPlaceholderText("Paste PGN here...")
         layout.addWidget(self.pgn_text)
         
@@ -318,6 +382,13 @@ class PGNSplitterDialog(QDialog):
         btn_layout.addWidget(self.split_btn)
         
         layout.addLayout(btn_layout)
+
+    def reset(self):
+        """
+        @brief Clear the text and status left over from the last split.
+        """
+        self.pgn_text.clear()
+        self.pgn_text.setPlaceholderText("Paste PGN here...")
     
     def load_pgn_file(self):
         """
@@ -328,7 +399,7 @@ class PGNSplitterDialog(QDialog):
         )
         if file_name:
             with open(file_name, 'r') as f:
-                self.pgn_text.setText(f.read())
+                self.pgn_text.setPlainText(f.read())
     
     def split_pgn(self):
         """
@@ -355,23 +426,19 @@ class PGNSplitterDialog(QDialog):
         
         try:
             # Read games from the PGN text
-            pgn_io = io.StringIO(pgn_content)
             game_count = 0
-            while True:
-                game = chess.pgn.read_game(pgn_io)
-                if game is None:
-                    break
-                    
+            for headers, game_text in iter_pgn_games(pgn_content):
                 # Generate filename from game metadata
-                white = game.headers.get("White", "Unknown")
-                black = game.headers.get("Black", "Unknown")
-                date = game.headers.get("Date", "Unknown").replace(".", "-")
+                # read_headers leaves out missing roster tags; use read_game's defaults for them
+                white = headers.get("White", "?")
+                black = headers.get("Black", "?")
+                date = headers.get("Date", "????.??.??").replace(".", "-")
                 fname = f"{white}_vs_{black}_{date}_{game_count}.pgn"
                 fname = "".join(c for c in fname if c.isalnum() or c in "._- ")
                 
                 # Save individual game
                 with open(os.path.join(output_dir, fname), 'w') as f:
-                    f.write(str(game))
+                    f.write(game_text.strip() + "\n")
                 
                 game_count += 1
                 progress.setValue(int((game_count % 100) * (100/100)))
@@ -394,7 +461,7 @@ class PlayStockfishDialog(QDialog):
         """
         super().__init__(parent)
         self.setWindowTitle("Play Against Stockfish")
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         
         layout = QVBoxLayout(self)
         
@@ -449,7 +516,7 @@ class NoteDialog(QDialog):
     def __init__(self, current_note="", parent=None):
         super().__init__(parent)
         self.setWindowTitle("Move Note")
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         self.setModal(True)
         self.setStyleSheet("""
             NoteDialog {
@@ -514,7 +581,7 @@ class LoadingDialog(QDialog):
     def __init__(self, title, label_text, parent=None):
         super().__init__()
         self.setWindowTitle(title)
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         layout = QVBoxLayout()
         self.label = QLabel(label_text)
         layout.addWidget(self.label)
@@ -523,11 +590,10 @@ class LoadingDialog(QDialog):
         self.setFixedSize(300, 100)
 
 class OpeningSearchDialog(QDialog):
-    def __init__(self, game_tab, parent=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.game_tab = game_tab
         self.setWindowTitle("Load Opening")
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         self.openings_data = []
         self.opening_names = []
         
@@ -656,8 +722,7 @@ class OpeningSearchDialog(QDialog):
                     break
         
         if selected_opening:
-            # Load the opening into the game tab
-            # self.game_tab.load_opening(selected_opening)
+            # The caller loads it into a new tab once the dialog is accepted
             self.selected_opening = selected_opening
             self.accept()
         else:
@@ -666,6 +731,16 @@ class OpeningSearchDialog(QDialog):
                               "The selected opening could not be found in the database.",
                               QMessageBox.Ok)
 
+# Size of the promotion choice icons, as the dialog has always shown them
+PROMOTION_ICON_SIZE = 50
+
+def warm_promotion_icons():
+    """
+    @brief Rasterize the promotion choices ahead of time so the first promotion opens instantly.
+    """
+    for symbol in "QRBNqrbn":
+        piece_pixmap(symbol, PROMOTION_ICON_SIZE)
+
 class PromotionDialog(QDialog):
     def __init__(self, color, parent=None):
         super().__init__(parent)
@@ -677,9 +752,7 @@ class PromotionDialog(QDialog):
         
         for piece in pieces:
             button = QPushButton()
-            piece_svg = chess.svg.piece(chess.Piece.from_symbol(piece))
-            pixmap = QPixmap(50, 50)
-            pixmap.loadFromData(piece_svg.encode())
+            pixmap = piece_pixmap(piece, PROMOTION_ICON_SIZE)
             button.setIcon(QIcon(pixmap))
             button.setIconSize(pixmap.size())
             button.clicked.connect(lambda checked, p=piece: self.select_piece(p))
@@ -0,0 +1,203 @@
+import platform
+import queue
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import chess.engine
+from engine_worker import engine_lock
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Keeps engines from opening a console window on Windows; 0 is the POSIX default
+ENGINE_CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+# Kernel buffer requested for the engine's stdout pipe (Linux only)
+ENGINE_PIPE_SIZE = 1 << 20
+
+def popen_engine(engine_path, **popen_args):
+    """
+    @brief Start a UCI engine with a larger stdout pipe where the OS allows it.
+
+    python-chess owns stdin/stdout/bufsize of the process, so only the kernel pipe
+    is widened: a deep MultiPV search writes many info lines, and a 1MB pipe lets the
+    engine run ahead of the reader instead of blocking every 64KB.
+    @param engine_path Engine executable.
+    @param popen_args Extra arguments for subprocess; creationflags defaults to ENGINE_CREATION_FLAGS.
+    @return The chess.engine.SimpleEngine.
+    """
+    popen_args.setdefault("creationflags", ENGINE_CREATION_FLAGS)
+    engine = chess.engine.SimpleEngine.popen_uci(engine_path, **popen_args)
+    if fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
+        try:
+            pipe = engine.protocol.transport.get_pipe_transport(1).get_extra_info("pipe")
+            fcntl.fcntl(pipe.fileno(), fcntl.F_SETPIPE_SZ, ENGINE_PIPE_SIZE)
+        except (AttributeError, OSError):
+            pass  # Keep the default size, e.g. above /proc/sys/fs/pipe-max-size
+    return engine
+
+class EnginePool:
+    def __init__(self, engine_path=None, size=1, options=None, engines=()):
+        """
+        @brief Keep warm UCI engine processes and share analyse() calls between them.
+        @param engine_path Executable used to start (and restart) engines.
+        @param size Number of engine processes, and of searches that can run at once.
+        @param options UCI options applied to every engine the pool starts.
+        @param engines Already running engines to adopt, e.g. the main window's engine.
+        """
+        self.engine_path = engine_path
+        self.options = options or {}
+        self.size = max(size, len(engines))
+        self.engines = list(engines)
+        self._adopted = set(id(engine) for engine in engines)  # Owned by someone else, never quit here
+        self._idle = queue.Queue()
+        for engine in self.engines:
+            self._idle.put(engine)
+        self._lock = threading.Lock()
+        self.restart_error = None  # Why the last replacement engine failed to start
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="engine")
+
+    def available(self):
+        """
+        @brief Check whether the pool has, or can start, an engine.
+        @return True if submit() can be served.
+        """
+        return bool(self.engines) or self.engine_path is not None
+
+    def submit(self, board, limit, multipv=None, on_info=None, stop=None):
+        """
+        @brief Queue a search on the next idle engine.
+        @param board Position to analyze; copied so the caller may keep editing it.
+        @param limit chess.engine.Limit for the search.
+        @param multipv Number of lines, or None for a single info dict.
+        @param on_info Optional callable given a snapshot of all lines each time the deepest
+               line is updated; the search then streams through engine.analysis().
+        @param stop Optional threading.Event that ends a streaming search early.
+        @return concurrent.futures.Future resolving to the analyse() result.
+        """
+        return self._executor.submit(self._analyse, board.copy(stack=False), limit, multipv, on_info, stop)
+
+    def _analyse(self, board, limit, multipv, on_info=None, stop=None):
+        """
+        @brief Run one search, retrying on another engine if the first one dies.
+        """
+        attempts = self.size + 1
+        for attempt in range(attempts):
+            engine = self._acquire()
+            try:
+                # An adopted engine is also searched by its owner; a new command would cancel ours
+                with engine_lock(engine):
+                    if on_info is None:
+                        result = engine.analyse(board, limit, multipv=multipv)
+                    else:
+                        result = self._stream(engine, board, limit, multipv, on_info, stop)
+            except (chess.engine.EngineTerminatedError, BrokenPipeError):
+                self._replace(engine)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            except Exception:
+                # The engine survived (e.g. EngineError, an invalid position or a failing
+                # on_info); hand it back and let the caller's future report the error
+                self._idle.put(engine)
+                raise
+            self._idle.put(engine)
+            return result
+
+    def _stream(self, engine, board, limit, multipv, on_info, stop):
+        """
+        @brief Run a search through one engine.analysis() handle, reporting each completed depth.
+        @return List of info dicts like analyse(multipv=...), or one dict when multipv is None.
+        """
+        lines = multipv or 1
+        with engine.analysis(board, limit, multipv=multipv) as analysis:
+            for info in analysis:
+                if stop is not None and stop.is_set():
+                    analysis.stop()  # The engine still sends bestmove, which ends the loop
+                elif "pv" in info and info.get("multipv", 1) == lines:
+                    # The last line of this depth arrived; python-chess keeps mutating the
+                    # dicts in analysis.multipv, so hand out copies
+                    on_info([dict(line) for line in analysis.multipv])
+            result = [dict(line) for line in analysis.multipv]
+        return result if multipv is not None else result[0]
+
+    def _acquire(self):
+        """
+        @brief Take an idle engine, starting a new one while the pool is below size.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if not self.engines and self.engine_path is None:
+                raise RuntimeError("No engine available")
+            spawn = len(self.engines) < self.size and self.engine_path is not None
+            if spawn:
+                self.engines.append(None)  # Reserve the slot while the process starts
+        if spawn:
+            try:
+                engine = self._spawn()
+            except Exception:
+                with self._lock:
+                    self.engines.remove(None)
+                raise
+            with self._lock:
+                self.engines[self.engines.index(None)] = engine
+            return engine
+        engine = self._idle.get()
+        if engine is None:
+            raise RuntimeError(f"Engine restart failed: {self.restart_error}")  # Woken by a failed respawn
+        return engine
+
+    def _spawn(self):
+        """
+        @brief Start and configure one engine process.
+        """
+        engine = popen_engine(self.engine_path)
+        if self.options:
+            engine.configure(self.options)
+        return engine
+
+    def _replace(self, dead):
+        """
+        @brief Drop a dead engine and start its replacement on a background thread.
+        """
+        with self._lock:
+            if dead in self.engines:
+                self.engines.remove(dead)
+            self._adopted.discard(id(dead))
+        if self.engine_path is None:
+            return
+        with self._lock:
+            self.engines.append(None)
+
+        def respawn():
+            try:
+                engine = self._spawn()
+            except Exception as e:
+                with self._lock:
+                    self.engines.remove(None)
+                    self.restart_error = e
+                self._idle.put(None)  # Wake a search waiting for this engine
+                return
+            with self._lock:
+                self.engines[self.engines.index(None)] = engine
+            self._idle.put(engine)
+
+        threading.Thread(target=respawn, daemon=True).start()
+
+    def quit(self):
+        """
+        @brief Stop the workers and every engine process the pool started.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            engines, self.engines = self.engines, []
+        for engine in engines:
+            if engine is None or id(engine) in self._adopted:
+                continue
+            try:
+                engine.quit()
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError, OSError):
+                pass  # Already gone
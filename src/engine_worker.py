@@ -0,0 +1,127 @@
+import threading
+import weakref
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+
+
+class EngineTaskSignals(QObject):
+    """Signals emitted by an EngineTask, delivered on the GUI thread."""
+    finished = Signal(object)
+    failed = Signal(object)
+    progress = Signal(object)
+
+
+class EngineTask(QRunnable):
+    def __init__(self, fn, *args, **kwargs):
+        """
+        @brief Wrap a blocking engine call so it can run on the global thread pool.
+        @param fn Callable doing the engine work (e.g. engine.play).
+        @param args Positional arguments for fn.
+        @param kwargs Keyword arguments for fn.
+        """
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = EngineTaskSignals()
+
+    def run(self):
+        """
+        @brief Execute the engine call and report the result or the exception.
+        """
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+# Tasks started by run_engine_task that have not reported back yet
+_RUNNING = set()
+
+# One lock per engine, for callers that must not be cancelled by another command
+_ENGINE_LOCKS = weakref.WeakKeyDictionary()
+_ENGINE_LOCKS_GUARD = threading.Lock()
+
+def engine_lock(engine):
+    """
+    @brief Get the lock serializing searches on one engine.
+
+    A new command on a python-chess engine cancels the one in flight, so a
+    background search and a GUI-thread search take this lock around analyse().
+    @param engine The chess.engine.SimpleEngine.
+    @return threading.Lock shared by every caller using this engine.
+    """
+    with _ENGINE_LOCKS_GUARD:
+        lock = _ENGINE_LOCKS.get(engine)
+        if lock is None:
+            lock = _ENGINE_LOCKS[engine] = threading.Lock()
+        return lock
+
+
+def call_locked(engine, fn, *args, **kwargs):
+    """
+    @brief Call fn while holding the engine's lock, e.g. as the job of run_engine_task.
+    @param engine The chess.engine.SimpleEngine fn talks to.
+    @param fn Engine call such as engine.analyse or engine.play.
+    @return fn's result.
+    """
+    with engine_lock(engine):
+        return fn(*args, **kwargs)
+
+
+def run_engine_task(fn, *args, on_finished=None, on_failed=None, **kwargs):
+    """
+    @brief Run a blocking engine call off the GUI thread.
+
+    python-chess' SimpleEngine already drives the UCI protocol on its own
+    persistent asyncio loop; this only moves the wait for the result off the
+    Qt event loop so the window keeps painting while the engine thinks.
+    @param fn Callable doing the engine work.
+    @param on_finished Slot receiving the result on the GUI thread.
+    @param on_failed Slot receiving the exception on the GUI thread.
+    @return The submitted EngineTask.
+    """
+    task = EngineTask(fn, *args, **kwargs)
+    # Keep the task (and its signals) alive until it reports, even if the caller drops it
+    _RUNNING.add(task)
+    task.signals.finished.connect(lambda _: _RUNNING.discard(task))
+    task.signals.failed.connect(lambda _: _RUNNING.discard(task))
+    if on_finished is not None:
+        task.signals.finished.connect(on_finished)
+    if on_failed is not None:
+        task.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(task)
+    return task
+
+
+def watch_future(future, on_finished=None, on_failed=None, signals=None):
+    """
+    @brief Deliver a concurrent.futures.Future's outcome to slots on the GUI thread.
+    @param future Future returned by e.g. EnginePool.submit.
+    @param on_finished Slot receiving the result.
+    @param on_failed Slot receiving the exception.
+    @param signals Existing EngineTaskSignals to use, e.g. one whose progress signal was
+           already handed to the job; a new one is created if None.
+    @return The EngineTaskSignals carrying the outcome; keep a reference until it fires.
+    """
+    if signals is None:
+        signals = EngineTaskSignals()
+    # Queued even when the future is already done, so the caller's slots never run inside this call
+    if on_finished is not None:
+        signals.finished.connect(on_finished, Qt.QueuedConnection)
+    if on_failed is not None:
+        signals.failed.connect(on_failed, Qt.QueuedConnection)
+
+    def done(f):
+        # Runs on the pool thread; the queued signal hops back to the GUI thread
+        if f.cancelled():
+            return
+        error = f.exception()
+        if error is not None:
+            signals.failed.emit(error)
+        else:
+            signals.finished.emit(f.result())
+
+    future.add_done_callback(done)
+    return signals
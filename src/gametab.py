@@ -5,16 +5,103 @@ import chess.pgn
 import chess.engine
 import chess.svg
 import io
-from datasets import load_dataset
 import polars as pl
 import re
 from PySide6.QtWidgets import *
 from PySide6.QtSvgWidgets import QSvgWidget
-from PySide6.QtCore import QByteArray, QSettings, Qt, QPointF, QRectF, QMimeData, QPoint, QTimer
-from PySide6.QtGui import QPainter, QColor, QPixmap, QPen, QFont, QDrag
+from PySide6.QtCore import QSettings, Qt, QRectF, QPoint, QTimer
+from PySide6.QtGui import QPainter, QPainterPath, QColor, QPen, QFont, QDrag
 import math
+import asyncio
+import concurrent.futures
+from collections import OrderedDict
 from utils import MoveRow, EvaluationGraphPG
-from dialogs import LoadingDialog, clean_pgn_moves, load_openings, OPENINGS_DB, OPENINGS_LOADED_FLAG, PromotionDialog
+from engine_worker import EngineTaskSignals, run_engine_task, engine_lock, call_locked
+from board_svg import render_board_svg, piece_pixmap, square_mime_data, dropped_square
+from dialogs import LoadingDialog, find_opening, load_openings, OPENINGS_DB, OPENINGS_LOADED_FLAG, PromotionDialog
+
+# Game-over dialog text for each non-checkmate termination
+GAME_OVER_MESSAGES = {
+    chess.Termination.STALEMATE: "Game Over - Stalemate!",
+    chess.Termination.INSUFFICIENT_MATERIAL: "Game Over - Draw by insufficient material!",
+    chess.Termination.SEVENTYFIVE_MOVES: "Game Over - Draw by fifty move rule!",
+    chess.Termination.FIFTY_MOVES: "Game Over - Draw by fifty move rule!",
+    chess.Termination.FIVEFOLD_REPETITION: "Game Over - Draw by repetition!",
+    chess.Termination.THREEFOLD_REPETITION: "Game Over - Draw by repetition!",
+}
+
+# Display searches kept per tab, so stepping back and forth through a game reuses them
+DISPLAY_CACHE_LIMIT = 1000
+
+# Retries of a computer move whose search was interrupted, before the error is shown
+COMPUTER_MOVE_RETRIES = 2
+# Errors that leave the engine usable, e.g. a search cancelled by another command;
+# EngineTerminatedError subclasses EngineError but is never retried
+RECOVERABLE_ENGINE_ERRORS = (chess.engine.EngineError, concurrent.futures.CancelledError, asyncio.CancelledError)
+
+def display_cache_key(board, multipv, postime):
+    """
+    @brief Key a display search by position and the settings it ran with.
+    """
+    return (board.board_fen(), board.turn, board.castling_rights, board.ep_square, multipv, postime)
+
+def analyse_for_display(engine, boards, limit, multipv, is_current=None):
+    """
+    @brief Run the searches GameTab.update_display needs, on a worker thread.
+    @param engine The shared engine.
+    @param boards Positions to search; None entries are skipped and the same board
+           object listed twice is searched once.
+    @param limit chess.engine.Limit for each search.
+    @param multipv Number of top lines.
+    @param is_current Optional callable; once it returns False the request was replaced,
+           and the remaining searches are skipped.
+    @return List of analyse() results aligned with boards, None where nothing was searched.
+    """
+    found = {}
+    with engine_lock(engine):
+        for board in boards:
+            if board is None or id(board) in found:
+                continue
+            # Checked before every search, so stepping through a game never queues stale work
+            if is_current is not None and not is_current():
+                break
+            found[id(board)] = engine.analyse(board, limit, multipv=multipv)
+    return [found.get(id(board)) if board is not None else None for board in boards]
+
+def analyse_game(engine, moves, limit, progress=None, options=None):
+    """
+    @brief Evaluate the position before and after every move of a game, on a worker thread.
+    @param engine The shared engine.
+    @param moves Main line moves from the standard starting position.
+    @param limit chess.engine.Limit for each search.
+    @param progress Optional callable given the number of moves done so far.
+    @param options Optional UCI options applied before the first search.
+    @return List of (score before, score after) relative PovScores, stopping at game over.
+    """
+    board = chess.Board()
+    scores = []
+    if options:
+        call_locked(engine, engine.configure, options)
+    for i, move in enumerate(moves):
+        if board.is_game_over():
+            break
+        # Locked per move, so display searches for the position on screen run in between
+        with engine_lock(engine):
+            pre_move_analysis = engine.analyse(board, limit, multipv=1)
+            board.push(move)
+            post_move_analysis = engine.analyse(board, limit, multipv=1)
+        scores.append((pre_move_analysis[0]["score"].relative, post_move_analysis[0]["score"].relative))
+        if progress is not None:
+            progress(i + 1)
+    return scores
+
+class MainlineGameBuilder(chess.pgn.GameBuilder):
+    """
+    @brief GameBuilder that skips side variations, so their moves are never parsed.
+    """
+    def begin_variation(self):
+        super().begin_variation()  # Keep the stack balanced for the end_variation() still sent on ")"
+        return chess.pgn.SKIP
 
 class CustomSVGWidget(QSvgWidget):
     def __init__(self, parent=None):
@@ -25,6 +112,7 @@ class CustomSVGWidget(QSvgWidget):
         super().__init__(parent)
         self.squares = {}  # {square: QColor, ...}
         self.square_size = 60
+        self._inv_square_size = 1 / self.square_size  # Kept in step with square_size by resizeEvent
         self.drag_info = {}  # New: info dict passed from GameTab
         self.highlight_moves = []  # NEW: squares to highlight
         self.last_move_eval = None  # NEW: Store evaluation symbol for last move
@@ -34,7 +122,33 @@ class CustomSVGWidget(QSvgWidget):
         self.drag_start_position = None  # Add this line
         self.setAcceptDrops(True)  # Add this line to explicitly enable drops
         self.game_tab = parent  # Store reference to GameTab parent
+        self._geometry_key = None  # (square_size, flipped, offsets) of _square_rects
+        self._square_rects = ()
+        self._square_centers = ()
     
+    def square_geometry(self, offset_x, offset_y):
+        """
+        @brief Get the on-screen rect and centre of every square, computed once per layout.
+        @param offset_x Horizontal offset of the board inside the widget.
+        @param offset_y Vertical offset of the board inside the widget.
+        @return (rects, centers): tuples of 64 QRectF and 64 QPointF indexed by square.
+        """
+        key = (self.square_size, self.flipped, offset_x, offset_y)
+        if key != self._geometry_key:
+            rects = []
+            for square in chess.SQUARES:
+                f = chess.square_file(square)
+                r = chess.square_rank(square)
+                disp_file, disp_rank = (7 - f, r) if self.flipped else (f, 7 - r)
+                # Boards are drawn one pixel in from the offset
+                x = offset_x + disp_file * self.square_size + 1
+                y = offset_y + disp_rank * self.square_size + 1
+                rects.append(QRectF(x, y, self.square_size, self.square_size))
+            self._square_rects = tuple(rects)
+            self._square_centers = tuple(rect.center() for rect in rects)
+            self._geometry_key = key
+        return self._square_rects, self._square_centers
+
     def resizeEvent(self, event):
         """
         Handle resize events to maintain a square board.
@@ -48,6 +162,7 @@ class CustomSVGWidget(QSvgWidget):
         
         # Calculate square size based on the widget size
         self.square_size = min_size / 8
+        self._inv_square_size = 8 / min_size if min_size else 0
         
         super().resizeEvent(event)
 
@@ -63,28 +178,8 @@ class CustomSVGWidget(QSvgWidget):
         global_offset_x = (self.width() - board_size) / 2
         global_offset_y = (self.height() - board_size) / 2
 
-        # Map a chess square to its (file, rank) coordinates with proper flipping
-        def get_square_coordinates(square):
-            f = chess.square_file(square)
-            r = chess.square_rank(square)
-            if self.flipped:
-                return 7 - f, r
-            else:
-                return f, 7 - r
-
-        # Return a QRectF for a square at its position including global offset
-        def get_square_rect(square):
-            disp_file, disp_rank = get_square_coordinates(square)
-            x = global_offset_x + disp_file * self.square_size
-            y = global_offset_y + disp_rank * self.square_size
-            x = x - (disp_file - (disp_file + 1))
-            y = y - (disp_rank - (disp_rank + 1))
-            return QRectF(x, y, self.square_size, self.square_size)
-
-        # Calculate the center of a square
-        def get_square_center(square):
-            rect = get_square_rect(square)
-            return rect.center()
+        # Square rects and centres come from a table rebuilt only on resize or flip
+        rects, centers = self.square_geometry(global_offset_x, global_offset_y)
         
         # Draw evaluation symbol in the square of the last move
         if self.last_move_eval:
@@ -102,7 +197,7 @@ class CustomSVGWidget(QSvgWidget):
             elif eval_symbol == '🔥':
                 painter.setPen(QColor("orange"))
             
-            rect = get_square_rect(last_move.to_square)
+            rect = rects[last_move.to_square]
             alignment = Qt.AlignRight | Qt.AlignTop
             painter.drawText(rect, alignment, eval_symbol)
 
@@ -113,10 +208,11 @@ class CustomSVGWidget(QSvgWidget):
             painter.setPen(pen)
             brush = QColor(0, 150, 0, 100)
             painter.setBrush(brush)
+            radius = self.square_size / 5
+            path = QPainterPath()  # All circles go to the paint engine in one call
             for sq in self.highlight_moves:
-                center = get_square_center(sq)
-                radius = self.square_size / 5
-                painter.drawEllipse(center, radius, radius)
+                path.addEllipse(centers[sq], radius, radius)
+            painter.drawPath(path)
 
         # Draw drag info
         if self.drag_info.get("dragging"):
@@ -139,22 +235,23 @@ class CustomSVGWidget(QSvgWidget):
             pen = QPen(QColor(255, 170, 0, 160), 5)
             painter.setPen(pen)
             painter.setBrush(Qt.NoBrush)
+            radius = self.square_size / 3
+            path = QPainterPath()
             for sq in self.user_circles:
-                center = get_square_center(sq)
-                radius = self.square_size / 3
-                painter.drawEllipse(center, radius, radius)
+                path.addEllipse(centers[sq], radius, radius)
+            painter.drawPath(path)
         
         if game_tab is not None:
             for arrow in game_tab.arrows:
                 start_sq, end_sq = arrow
-                start_center = get_square_center(start_sq)
-                end_center = get_square_center(end_sq)
+                start_center = centers[start_sq]
+                end_center = centers[end_sq]
                 painter.drawLine(start_center, end_center)
             
             if game_tab.current_arrow is not None:
                 start_sq, end_sq = game_tab.current_arrow
-                start_center = get_square_center(start_sq)
-                end_center = get_square_center(end_sq)
+                start_center = centers[start_sq]
+                end_center = centers[end_sq]
                 painter.drawLine(start_center, end_center)
 
         painter.end()
@@ -174,8 +271,11 @@ class CustomSVGWidget(QSvgWidget):
     def dropEvent(self, event):
         """Handle drop events."""
         square = self.square_at_position(event.position())
-        if square is not None and event.mimeData().hasText():
-            from_square = int(event.mimeData().text())
+        if self.game_tab and self.game_tab.computer_thinking:
+            event.ignore()  # The engine is choosing its reply
+            return
+        from_square = dropped_square(event.mimeData())
+        if square is not None and from_square is not None:
             if self.game_tab:
                 # Check if this would be a pawn promotion move
                 is_promotion = (
@@ -238,20 +338,27 @@ class CustomSVGWidget(QSvgWidget):
         if adjusted_x < 0 or adjusted_y < 0:
             return None
             
-        file_size = board_size / 8
-        rank_size = board_size / 8
-        
-        if self.flipped:
-            file_idx = 7 - int(adjusted_x / file_size)
-            rank_idx = int(adjusted_y / rank_size)
-        else:
-            file_idx = int(adjusted_x / file_size)
-            rank_idx = 7 - int(adjusted_y / rank_size)
-            
+        file_idx, rank_idx = self.board_coords(adjusted_x, adjusted_y, self.flipped, self._inv_square_size)
         if 0 <= file_idx < 8 and 0 <= rank_idx < 8:
             return chess.square(file_idx, rank_idx)
         return None
 
+    @staticmethod
+    def board_coords(x, y, flipped, inv_square_size):
+        """
+        @brief Map a point relative to the board's top-left corner to (file, rank).
+        @param x Horizontal distance from the board's left edge; must not be negative.
+        @param y Vertical distance from the board's top edge; must not be negative.
+        @param flipped True when Black is at the bottom.
+        @param inv_square_size 1 / square size, so mapping is two multiplications.
+        @return (file index, rank index); either may be 8 or more just past the far edge.
+        """
+        file_idx = int(x * inv_square_size)
+        rank_idx = int(y * inv_square_size)
+        if flipped:
+            return 7 - file_idx, rank_idx
+        return file_idx, 7 - rank_idx
+
 class GameTab(QWidget):
     def __init__(self, parent=None):
         """
@@ -261,9 +368,11 @@ class GameTab(QWidget):
         super().__init__(parent)
         self.engine = parent.engine
         self.settings = QSettings("BoardMaster", "BoardMaster")
+        self.reload_settings()
         self.current_game = None
         self.current_board = chess.Board()
         self.moves = []  # Main line moves
+        self.boards_by_ply = []  # Board after each ply of a loaded game, [0] is the start position
         self.variations = {}  # Dictionary to store variations: {move_index: [variation_moves]}
         self.current_variation = None  # Tuple of (start_index, variation_index)
         self.played_moves = []
@@ -272,6 +381,8 @@ class GameTab(QWidget):
         self.variation_evaluations = {}  # Dictionary to store evaluations for variations
         self.selected_square = None
         self.legal_moves = set()
+        self._legal_key = None  # Position the _legal_targets index was built for
+        self._legal_targets = {}  # from_square -> [to_square] of current_board
         self.square_size = 70
         self.flipped = False
         self.is_live_game = False
@@ -279,6 +390,14 @@ class GameTab(QWidget):
         self.drag_start_square = None
         self.drag_current_pos = None
         self.drag_offset = None
+        self.drag_pixmap = None  # Piece image composed once per pickup
+        self.computer_thinking = False  # True while engine.play runs on the worker thread
+        self.computer_task = None
+        self.computer_move_retries = 0  # Consecutive failed computer moves
+        # Identifies the game on screen, so results searched for a replaced game are dropped.
+        # Not passed to the engine as game=: it is shared by every tab and board editor, and
+        # a changing token would make it send ucinewgame and clear its hash on each switch.
+        self.game_id = object()
         self.move_evaluations_scores = []  # existing evaluations list for graphing
         self.white_moves = [] # NEW: store white evaluations per move pair
         self.black_moves = [] # NEW: store black evaluations per move pair
@@ -287,9 +406,17 @@ class GameTab(QWidget):
         self.current_arrow = None
         self.user_circles = set()  # NEW: Set of squares with circle markers
         self.show_arrows = True  # Add this after other initializations
+        self.display_token = None  # Identifies the newest update_display search
+        self.display_task = None
+        self.game_analysis_task = None  # analyse_game running for analyze_all_moves
+        self.live_eval_task = None
+        self.display_cache = OrderedDict()  # display_cache_key() -> analyse() result, LRU bounded by DISPLAY_CACHE_LIMIT
         self.last_shown_game_over = False  # Add this to track if we've shown the game over dialog
         self.has_been_analyzed = False  # Add this new flag
         self.move_notes = {}  # Add this new dict to store move notes
+        self.move_rows = []  # MoveRow per move pair, in move list order
+        self.move_list_key = None  # Content the move list was last built from
+        self.highlighted_row = None  # MoveRow currently highlighted, if any
         self.last_made_move = None
 
         self.white_accuracy = 0
@@ -532,14 +659,27 @@ class GameTab(QWidget):
         Load a PGN game from a provided PGN string.
         Returns True if loaded successfully; otherwise False.
         """
+        try:
+            # Only the mainline is replayed for review; analysis loads keep the full tree
+            builder = chess.pgn.GameBuilder if is_analysis else MainlineGameBuilder
+            game = chess.pgn.read_game(io.StringIO(pgn_string), Visitor=builder)
+        except Exception as e:
+            print(f"Error loading game: {str(e)}")
+            return False
+        return self.load_game(game, is_analysis)
+
+    def load_game(self, game, is_analysis=False):
+        """
+        Load an already parsed chess.pgn.Game, e.g. one streamed from a PGN file.
+        Returns True if loaded successfully; otherwise False.
+        """
         self.is_live_game = False
+        self.game_id = object()  # Results for the previous game are now stale
         self.current_variation = None
         self.variations = {}
         self.variation_evaluations = {}
         try:
-            # Read the game once from the PGN string.
-            pgn_io = io.StringIO(pgn_string)
-            self.current_game = chess.pgn.read_game(pgn_io)
+            self.current_game = game
             if not self.current_game:
                 return False
             # Save headers from the loaded game.
@@ -557,6 +697,15 @@ Black: {self.hdrs.get('Black')}({self.hdrs.get('BlackElo')})
 
         try:
             self.moves = list(self.current_game.mainline_moves())
+            # Snapshot every ply once, so jumps through the game copy a board instead of replaying it.
+            # The snapshots drop the move stack, which would make them O(N^2) in total; only the final
+            # position keeps it, the one place a fivefold repetition can end the game.
+            board = self.current_game.board()
+            self.boards_by_ply = [board.copy(stack=False)]
+            for move in self.moves:
+                board.push(move)
+                self.boards_by_ply.append(board.copy(stack=False))
+            self.boards_by_ply[-1] = board
             total_moves = len(self.moves)
             self.loading_bar = self.show_loading(max=total_moves)
             self.progress.setMaximum(total_moves)
@@ -571,10 +720,55 @@ Black: {self.hdrs.get('Black')}({self.hdrs.get('BlackElo')})
             print(f"Error loading game: {str(e)}")
             return False
 
-    def analyze_all_moves(self):
+    def analyze_all_moves(self, on_done=None, options=None):
+        """
+        @brief Analyze all moves of the loaded game on a worker thread, then calculate evaluations and accuracies.
+        @param on_done Optional callable given True once the results are stored, or False if the analysis failed.
+        @param options Optional UCI options the engine is configured with first.
+        """
+        if self.game_analysis_task is not None:
+            return
+        game_id = self.game_id
+        moves = list(self.moves)
+        signals = EngineTaskSignals()
+        signals.progress.connect(self.progress.setValue, Qt.QueuedConnection)
+        self.game_analysis_task = run_engine_task(
+            analyse_game,
+            self.engine,
+            moves,
+            chess.engine.Limit(time=self._cfg["fulltime"]),
+            signals.progress.emit,
+            options,
+            # signals is held by the lambdas until the task reports back
+            on_finished=lambda scores, signals=signals: self.game_analysis_ready(game_id, moves, scores, on_done),
+            on_failed=lambda error, signals=signals: self.game_analysis_failed(error, on_done)
+        )
+
+    def game_analysis_failed(self, error, on_done=None):
+        """
+        @brief Report a failed full-game analysis.
+        @param error The exception raised by the engine.
+        @param on_done The callable given to analyze_all_moves.
+        """
+        self.game_analysis_task = None
+        print(f"Engine error: {error!r}")
+        if on_done is not None:
+            on_done(False)
+
+    def game_analysis_ready(self, game_id, moves, scores, on_done=None):
         """
-        @brief Analyze all moves of the loaded game to calculate evaluations and accuracies.
+        @brief Turn the scores found by analyse_game into move evaluations and accuracies.
+        @param game_id The game_id the analysis was started for.
+        @param moves The moves that were analyzed.
+        @param scores analyse_game's (before, after) scores per move.
+        @param on_done The callable given to analyze_all_moves.
         """
+        self.game_analysis_task = None
+        if game_id is not self.game_id or self.moves[:len(moves)] != moves:
+            # Another game was loaded or moves were taken back meanwhile
+            if on_done is not None:
+                on_done(False)
+            return
         temp_board = chess.Board()
         self.move_evaluations = []
         self.accuracies = {"white": [], "black": []}
@@ -594,23 +788,10 @@ Black: {self.hdrs.get('Black')}({self.hdrs.get('BlackElo')})
                 accuracy *= 0.5
             return max(0, min(100, accuracy))
 
-        for i, move in enumerate(self.moves):
-            if temp_board.is_game_over():
-                break
-
-            pre_move_analysis = self.engine.analyse(
-                temp_board,
-                chess.engine.Limit(time=self.settings.value("analysis/fulltime", 0.1, int)),
-                multipv=1
-            )
-            pre_move_eval = self.eval_to_cp(pre_move_analysis[0]["score"].relative)
-            temp_board.push(move)
-            post_move_analysis = self.engine.analyse(
-                temp_board,
-                chess.engine.Limit(time=self.settings.value("analysis/fulltime", 0.1, int)),
-                multipv=1
-            )
-            post_move_eval = -self.eval_to_cp(post_move_analysis[0]["score"].relative)
+        for i, (pre_move_score, post_move_score) in enumerate(scores):
+            temp_board.push(moves[i])
+            pre_move_eval = self.eval_to_cp(pre_move_score)
+            post_move_eval = -self.eval_to_cp(post_move_score)
             eval_diff = abs(post_move_eval - pre_move_eval)
             self.move_evaluations_scores.append(post_move_eval)
             accuracy = calculate_accuracy(eval_diff, pre_move_eval)
@@ -631,8 +812,6 @@ Black: {self.hdrs.get('Black')}({self.hdrs.get('BlackElo')})
             else:
                 evaluation = "🔥"
             self.move_evaluations.append(evaluation)
-            self.progress.setValue(i + 1)
-            QApplication.processEvents()
         
         global OPENINGS_DB, OPENINGS_LOADED_FLAG
         if len(OPENINGS_DB) == 0 or not OPENINGS_LOADED_FLAG:
@@ -662,7 +841,9 @@ Black: {self.hdrs.get('Black')}({self.hdrs.get('BlackElo')})
             if self.accuracies["black"]
             else 0
         )
-    
+        if on_done is not None:
+            on_done(True)
+
     def update_game_summary(self):
         """
         @brief Update the game summary based on move evaluations.
@@ -724,6 +905,22 @@ White (Accuracy: {self.white_accuracy}): Excellent: {white_excellent}✅, Good:
 Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good: {black_good}👍, Inaccuracy: {black_inacc}⚠️, Mistake: {black_mistake}❌, Blunder: {black_blunder}🔥"""
         self.summary_label.setText(summary)
 
+    def reload_settings(self):
+        """
+        @brief Read the analysis and display settings once into self._cfg.
+
+        Called on creation and when the settings dialog saves, so move steps never go
+        through the QSettings backend. Defaults match SettingsDialog.
+        """
+        self._cfg = {
+            "postime": self.settings.value("analysis/postime", 0.1, float),
+            "fulltime": self.settings.value("analysis/fulltime", 0.1, int),
+            "lines": self.settings.value("engine/lines", 3, int),
+            "show_arrows": self.settings.value("display/show_arrows", True, bool),
+            "arrow_move": self.settings.value("display/arrow_move", True, bool),
+            "load_openings": self.settings.value("game/load_openings", True, bool),
+        }
+
     def eval_to_cp(self, eval_score):
         """
         @brief Convert an evaluation object to centipawns.
@@ -737,118 +934,214 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
                 return -20000 - eval_score.mate() * 10
         return eval_score.score()
 
+    def request_display_analysis(self, arrow_board, text_board, eval_board, eval_known):
+        """
+        @brief Start the searches for the arrows, top moves and evaluation bar on a worker.
+        @param arrow_board Position whose top lines are drawn as arrows, or None.
+        @param text_board Position whose top lines are listed, or None.
+        @param eval_board Position to evaluate for the bar when no stored score exists, or None.
+        @param eval_known True if update_display already set the bar from a stored score.
+        """
+        token = object()  # Results for an older position are dropped
+        self.display_token = token
+        postime = self._cfg["postime"]
+        multipv = self._cfg["lines"]
+        # Copy each distinct position once, so a board used twice is searched once
+        copies = {}
+        boards = [
+            copies.setdefault(id(board), board.copy()) if board is not None else None
+            for board in (arrow_board, text_board, eval_board)
+        ]
+        keys = [display_cache_key(board, multipv, postime) if board is not None else None for board in boards]
+        cached = []
+        for key in keys:
+            result = self.display_cache.get(key) if key is not None else None
+            if result is not None:
+                self.display_cache.move_to_end(key)
+            cached.append(result)
+        missing = [board if result is None else None for board, result in zip(boards, cached)]
+        if all(board is None for board in missing):
+            self.display_analysis_ready(token, boards[1], eval_known, cached)
+            return
+        self.display_task = run_engine_task(
+            analyse_for_display,
+            self.engine,
+            missing,
+            chess.engine.Limit(time=postime),
+            multipv,
+            lambda: self.display_token is token,
+            on_finished=lambda result, board=boards[1]: self.display_search_done(token, board, eval_known, keys, cached, result),
+            on_failed=lambda error: self.display_analysis_failed(token, error)
+        )
+
+    def display_search_done(self, token, text_board, eval_known, keys, cached, result):
+        """
+        @brief Cache the searches run by analyse_for_display and show them with the cached ones.
+        @param token The request this result belongs to.
+        @param text_board Position the listed top lines were searched on.
+        @param eval_known True if the bar already shows a stored score.
+        @param keys display_cache keys of the requested positions.
+        @param cached Results that came from the cache, None where a search ran.
+        @param result analyse_for_display's results, None where the cache was used.
+        """
+        for key, found in zip(keys, result):
+            if found is not None:
+                self.display_cache[key] = found  # Kept even if the user moved on, for when they return
+                if len(self.display_cache) > DISPLAY_CACHE_LIMIT:
+                    self.display_cache.popitem(last=False)
+        merged = [hit if hit is not None else found for hit, found in zip(cached, result)]
+        self.display_analysis_ready(token, text_board, eval_known, merged)
+
+    def display_analysis_ready(self, token, text_board, eval_known, result):
+        """
+        @brief Show the arrows, top moves and evaluation found by analyse_for_display.
+        @param token The request this result belongs to.
+        @param text_board Position the listed top lines were searched on.
+        @param eval_known True if the bar already shows a stored score.
+        @param result [arrow lines, listed lines, eval lines] from analyse_for_display.
+        """
+        if token is not self.display_token:
+            return
+        self.display_task = None
+        info, text_info, eval_info = result
+        eval_score = 0
+
+        if info is not None:
+            eval_score = self.eval_to_cp(info[0]["score"].relative)
+            arrows = []
+            for i, pv in enumerate(info, 0):
+                if "pv" in pv.keys() and self.show_arrows:
+                    move = pv["pv"][0]
+                    color = QColor("#00ff00") if i <= 0 else QColor("#007000")
+                    arrows.append(chess.svg.Arrow(
+                        tail=move.from_square,
+                        head=move.to_square,
+                        color=color.name()
+                    ))
+            self.render_board(tuple((arrow.tail, arrow.head, arrow.color) for arrow in arrows))
+            self.board_display.update()
+
+        if text_info is not None:
+            analysis_text = f"Move {(self.current_move_index + 1) // 2} "
+            analysis_text += (
+                f"({'White' if self.current_move_index % 2 == 0 else 'Black'})\n\n"
+            )
+
+            analysis_text += "Top moves:\n"
+            for i, pv in enumerate(text_info, 1):
+                if "pv" not in pv:
+                    continue
+                move = pv["pv"][0]
+                score = (
+                    pv["score"].white().score() / 100.0
+                    if pv["score"].white().score() is not None
+                    else 0
+                )
+                analysis_text += (
+                    f"{i}. {text_board.san(move)} (eval: {score:+.2f})\n"
+                )
+
+            self.analysis_text.setText(analysis_text)
+
+        if eval_info is not None:
+            eval_score = self.eval_to_cp(eval_info[0]["score"].relative)
+        if not eval_known:
+            self.set_win_bar(eval_score)
+
+    def display_analysis_failed(self, token, error):
+        """
+        @brief Report a failed display search unless a newer one replaced it.
+        @param token The request that failed.
+        @param error The exception raised by the engine.
+        """
+        if token is not self.display_token:
+            return
+        self.display_task = None
+        print(f"Engine error: {error!r}")
+
+    def render_board(self, arrows_key=()):
+        """
+        @brief Load the board SVG for the current position.
+        @param arrows_key Tuple of (tail, head, color) arrows to draw.
+        """
+        board_size = int(self.board_display.square_size * 8)
+        check = self.current_board.king(self.current_board.turn) if self.current_board.is_check() else None
+        lastmove = self.moves[self.current_move_index - 1] if self.current_move_index > 0 else None
+        self.board_display.load(render_board_svg(
+            self.current_board.board_fen(),
+            chess.BLACK if self.flipped else chess.WHITE,
+            check,
+            arrows_key,
+            lastmove,
+            board_size
+        ))
+
+    def set_win_bar(self, eval_score):
+        """
+        @brief Fill the evaluation bar for a centipawn score.
+        @param eval_score Score in centipawns.
+        """
+        self.win_bar.setStyleSheet(
+            f"background: qlineargradient(y1:0, y2:1, stop:0 white, stop:{max(0, min(100, 50 + (50 * (2 / (1+math.exp(-eval_score/400)) - 1)) ))/100} white, "
+            f"stop:{max(0, min(100, 50 + (50 * (2 / (1+math.exp(-eval_score/400)) - 1)) ))/100} black, stop:1 black);"
+        )
+
     def update_display(self):
         """
         @brief Update the board display, move list and evaluation graph.
         """
-        arrows = []
-        annotations = {}
-
         eval_score = 0
         squares = {}
 
         # Get the position BEFORE the current move
         if self.is_live_game == False:
-            if self.current_move_index > 0:
-                previous_board = chess.Board()
-                for move in self.moves[:self.current_move_index - 1]:
-                    previous_board.push(move)
+            if 0 < self.current_move_index < len(self.boards_by_ply):
+                previous_board = self.boards_by_ply[self.current_move_index - 1]
             else:
                 previous_board = self.current_board
         else:
-            # Handle live game previous position
-            previous_board = chess.Board()
-            if self.current_move_index > 0:
-                for move in self.moves[:self.current_move_index - 1]:
-                    previous_board.push(move)
+            # Handle live game previous position; the live board keeps its whole move stack
+            if self.current_move_index > 0 and self.current_board.move_stack:
+                previous_board = self.current_board.copy()
+                previous_board.pop()
             else:
                 previous_board = chess.Board()  # Start position for live game
 
-        if not self.current_board.is_game_over() and self.settings.value("display/show_arrows", True, bool):
+        analysis_board = None
+        if not self.current_board.is_game_over() and self._cfg["show_arrows"]:
             # Analyze the previous position (not the current one) to show what you could have played
-            if not self.settings.value("display/arrow_move", True, bool) and self.is_live_game == False:
-                info = self.engine.analyse(
-                    previous_board,  # Use previous_board here
-                    chess.engine.Limit(time=self.settings.value("analysis/postime", 0.1, float)),
-                    multipv=self.settings.value("engine/lines", 3, int)
-                )
+            if not self._cfg["arrow_move"] and self.is_live_game == False:
+                analysis_board = previous_board
             else:
-                info = self.engine.analyse(
-                    self.current_board,
-                    chess.engine.Limit(time=self.settings.value("analysis/postime", 0.1, float)),
-                    multipv=self.settings.value("engine/lines", 3, int)
-                )
-
-            main_eval = info[0]["score"].relative
-            eval_score = self.eval_to_cp(main_eval) if hasattr(self, 'eval_to_cp') else 0
-
-            analysis_text = f"Move {(self.current_move_index + 1) // 2} "
-            analysis_text += f"({'White' if self.current_move_index % 2 == 0 else 'Black'})\n\n"
-            analysis_text += "Top moves:\n"
-
-            for i, pv in enumerate(info, 0):
-                if "pv" in pv.keys():
-                    move = pv["pv"][0]
-                    score = self.eval_to_cp(pv["score"].relative) if hasattr(self, 'eval_to_cp') else 0
-                    if self.is_live_game == False:
-                        analysis_text += f"{i+1}. {previous_board.san(move)} (eval: {score/100:+.2f})\n"
-                    else:
-                        analysis_text += f"{i+1}. {self.current_board.san(move)} (eval: {score/100:+.2f})\n"
-
-                    color = QColor("#00ff00") if i <= 0 else QColor("#007000")
-
-                    if self.show_arrows:
-                        arrows.append(chess.svg.Arrow(
-                            tail=move.from_square,
-                            head=move.to_square,
-                            color=color.name()
-                        ))
-
-                    annotations[move.to_square] = f"{score/100.0:.2f}"
-
-            self.analysis_text.setText(analysis_text)
+                analysis_board = self.current_board
 
+        eval_board = None
+        eval_known = False
         if self.current_move_index > 0 and hasattr(self, 'move_evaluations_scores'):
             if self.current_move_index - 1 < len(self.move_evaluations_scores):
                 eval_score = self.move_evaluations_scores[self.current_move_index - 1]
+                eval_known = True
             else:
-                info = self.engine.analyse(
-                    self.current_board,
-                    chess.engine.Limit(time=self.settings.value("analysis/postime", 0.1, float)),
-                    multipv=1
-                )
-                eval_score = self.eval_to_cp(info[0]["score"].relative)
+                eval_board = self.current_board
+
+        # The top-moves list always shows the current position
+        text_board = self.current_board if not self.current_board.is_game_over() else None
+        needs_search = analysis_board is not None or text_board is not None or eval_board is not None
 
         if self.current_board.is_check():
             king_square = self.current_board.king(self.current_board.turn)
             if king_square is not None:
                 squares[king_square] = QColor(255, 0, 0, 150)
 
-        board_size = int(self.board_display.square_size * 8)
-        check = self.current_board.king(self.current_board.turn) if self.current_board.is_check() else None
-        lastmove = self.moves[self.current_move_index - 1] if self.current_move_index > 0 else None
-
-        board_svg = chess.svg.board(
-            self.current_board,
-            arrows=arrows,
-            lastmove=lastmove,
-            size=board_size,
-            check=check,
-            orientation=chess.BLACK if self.flipped else chess.WHITE
-        )
-        self.board_display.load(QByteArray(board_svg.encode("utf-8")))
+        self.render_board()
         self.board_display.squares = squares
-        if self.dragging and self.drag_current_pos and self.drag_offset:
-            piece = self.current_board.piece_at(self.drag_start_square)
-            if piece:
-                self.board_display.drag_info = {
-                    "dragging": True,
-                    "drag_current_pos": self.drag_current_pos,
-                    "drag_offset": self.drag_offset,
-                    "pixmap": self.get_piece_pixmap(piece)
-                }
-            else:
-                self.board_display.drag_info = {"dragging": False}
+        if self.dragging and self.drag_current_pos and self.drag_offset and self.drag_pixmap is not None:
+            self.board_display.drag_info = {
+                "dragging": True,
+                "drag_current_pos": self.drag_current_pos,
+                "drag_offset": self.drag_offset,
+                "pixmap": self.drag_pixmap
+            }
         else:
             self.board_display.drag_info = {"dragging": False}
         
@@ -864,17 +1157,21 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         else:
             self.board_display.last_move_eval = None
 
-        self.board_display.repaint()
+        self.board_display.update()
 
-        self.win_bar.setStyleSheet(
-            f"background: qlineargradient(y1:0, y2:1, stop:0 white, stop:{max(0, min(100, 50 + (50 * (2 / (1+math.exp(-eval_score/400)) - 1)) ))/100} white, "
-            f"stop:{max(0, min(100, 50 + (50 * (2 / (1+math.exp(-eval_score/400)) - 1)) ))/100} black, stop:1 black);"
-        )
+        if not needs_search or eval_known:
+            self.set_win_bar(eval_score)
+
+        # Arrows, top moves and the bar follow in display_analysis_ready, from the cache or a worker
+        self.display_token = None
+        self.display_task = None
+        if needs_search:
+            self.request_display_analysis(analysis_board, text_board, eval_board, eval_known)
         self.fen_box.setText(f"FEN: {self.current_board.fen()}")
 
         # Process opening detection for live games
         global OPENINGS_LOADED_FLAG
-        if self.is_live_game == True and self.settings.value("game/load_openings", True, bool):
+        if self.is_live_game == True and self._cfg["load_openings"]:
             if not OPENINGS_LOADED_FLAG:
                 # dialog = LoadingDialog(title="Loading Openings Database...", label_text="Please wait while the openings database is loaded...")
                 # dialog.show()
@@ -891,8 +1188,45 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
                 opening_eco = self.opening['eco']
                 self.opening_label.setText(f"Opening: {opening_name} ({opening_eco})")
 
-        # Always update the move list regardless of game type
+        # Always update the move list regardless of game type; the rows are only rebuilt when
+        # their content changed, plain navigation just moves the highlight
+        self.move_notes = {int(k) if isinstance(k, str) else k: v for k, v in self.move_notes.items()}
+        key = (tuple(self.moves), tuple(self.move_evaluations), tuple(self.move_evaluations_scores),
+               repr(self.variations), repr(self.variation_evaluations), tuple(self.move_notes.items()))
+        if key != self.move_list_key:
+            self.move_list_key = key
+            self.build_move_list()
+        self.highlight_move_rows()
+        self.check_game_over()
+
+    def build_move_list(self):
+        """
+        @brief Rebuild the move list rows and the evaluation graph from the game's moves.
+        """
+        self.move_list.setUpdatesEnabled(False)
+        try:
+            self.fill_move_list()
+        finally:
+            self.move_list.setUpdatesEnabled(True)
+
+        self.white_moves = []
+        self.black_moves = []
+        for i, move in enumerate(self.moves):
+            if i % 2 == 0:
+                if i < len(self.move_evaluations_scores):
+                    self.white_moves.append(self.move_evaluations_scores[i])
+            else:
+                if i < len(self.move_evaluations_scores):
+                    self.black_moves.append(self.move_evaluations_scores[i])
+        self.eval_graph.update_graph(self.white_moves, self.black_moves)
+
+    def fill_move_list(self):
+        """
+        @brief Add a MoveRow, plus any variation lines, for every pair of main line moves.
+        """
         self.move_list.clear()
+        self.move_rows = []
+        self.highlighted_row = None
         temp_board = chess.Board()
         move_number = 1
         i = 0
@@ -935,84 +1269,40 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
             self.move_list.addItem(item)
             self.move_list.setItemWidget(item, move_widget)
             
-            if i < self.current_move_index <= i + 1:
-                move_widget.highlight_white()
-            elif i + 1 < self.current_move_index <= i + 2:
-                move_widget.highlight_black()
-            else:
-                move_widget.highlight_off()
-            
-            note_dict = {}
-            for k, v in self.move_notes.items():
-                note_dict[int(k) if isinstance(k, str) else k] = v
-            self.move_notes = note_dict
+            self.move_rows.append(move_widget)
 
             # Then apply to move widgets
             if i in self.move_notes:
-                move_widget.white_label.note = self.move_notes[i]
                 move_widget.white_label.setToolTip(f"Note: {self.move_notes[i]}")
                 move_widget.white_label.update_style()
                 
             if i + 1 in self.move_notes and black_move:
-                move_widget.black_label.note = self.move_notes[i + 1]
                 move_widget.black_label.setToolTip(f"Note: {self.move_notes[i + 1]}")
                 move_widget.black_label.update_style()
             
             i += 2
             move_number += 1
 
-        self.analyze_position()
-        
-        if self.current_move_index > 0:
-            row = (self.current_move_index - 1) // 2
-            self.move_list.setCurrentRow(row)
-        
-        self.white_moves = []
-        self.black_moves = []
-        board = chess.Board()
-        for i, move in enumerate(self.moves):
-            board.push(move)
-            if i % 2 == 0:
-                if i < len(self.move_evaluations_scores):
-                    self.white_moves.append(self.move_evaluations_scores[i])
-            else:
-                if i < len(self.move_evaluations_scores):
-                    self.black_moves.append(self.move_evaluations_scores[i])
-        self.eval_graph.update_graph(self.white_moves, self.black_moves)
-        self.eval_graph.set_current_move((self.current_move_index + 1) // 2)
-        self.check_game_over()
-
-    def analyze_position(self):
+    def highlight_move_rows(self):
         """
-        @brief Analyze the current board position and update analysis text.
+        @brief Highlight the current move in the move list and the evaluation graph.
         """
-        if not self.current_board.is_game_over():
-            info = self.engine.analyse(
-                self.current_board,
-                chess.engine.Limit(
-                    time=self.settings.value("analysis/postime", 0.1, float)
-                ),
-                multipv=self.settings.value("engine/lines", 3, int),
-            )
-
-            analysis_text = f"Move {(self.current_move_index + 1) // 2} "
-            analysis_text += (
-                f"({'White' if self.current_move_index % 2 == 0 else 'Black'})\n\n"
-            )
-
-            analysis_text += "Top moves:\n"
-            for i, pv in enumerate(info, 1):
-                move = pv["pv"][0]
-                score = (
-                    pv["score"].white().score() / 100.0
-                    if pv["score"].white().score() is not None
-                    else 0
-                )
-                analysis_text += (
-                    f"{i}. {self.current_board.san(move)} (eval: {score:+.2f})\n"
-                )
+        # Only the previously highlighted row and the current one change style
+        row = None
+        if self.current_move_index > 0:
+            row_index = (self.current_move_index - 1) // 2
+            row = self.move_rows[row_index]
+            self.move_list.setCurrentRow(row_index)
+        if self.highlighted_row is not None and self.highlighted_row is not row:
+            self.highlighted_row.highlight_off()
+        if row is not None:
+            if self.current_move_index % 2:
+                row.highlight_white()
+            else:
+                row.highlight_black()
+        self.highlighted_row = row
 
-            self.analysis_text.setText(analysis_text)
+        self.eval_graph.set_current_move((self.current_move_index + 1) // 2)
 
     def move_selected(self, item):
         """
@@ -1034,9 +1324,12 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         @brief Jump to the specified move index in the game.
         @param index The move index.
         """
-        self.current_board = chess.Board()
-        for i in range(index + 1):
-            self.current_board.push(self.moves[i])
+        if not self.is_live_game and 0 <= index + 1 < len(self.boards_by_ply):
+            self.current_board = self.boards_by_ply[index + 1].copy()
+        else:
+            self.current_board = chess.Board()
+            for i in range(index + 1):
+                self.current_board.push(self.moves[i])
         self.current_move_index = index + 1
         self.update_display()
 
@@ -1045,6 +1338,11 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         @brief Advance the game by one move.
         """
         if self.current_move_index < len(self.moves):
+            if not self.is_live_game and self.current_move_index + 1 < len(self.boards_by_ply):
+                # Pushing onto a stackless snapshot would reach the final position without
+                # its repetition history; the last snapshot is the board that has it
+                self.goto_move(self.current_move_index)
+                return
             self.current_board.push(self.moves[self.current_move_index])
             self.current_move_index += 1
             self.update_display()
@@ -1131,6 +1429,9 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         @brief Go back one move.
         """
         if self.current_move_index > 0:
+            if not self.is_live_game and self.current_move_index < len(self.boards_by_ply):
+                self.goto_move(self.current_move_index - 2)  # Snapshots have no move stack to pop
+                return
             self.current_move_index -= 1
             self.current_board.pop()
             self.update_display()
@@ -1161,9 +1462,10 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         @brief Process key press events for move navigation.
         @param event The key press event.
         """
-        if event.key() == Qt.Key_Left:
+        key = event.key()
+        if key == Qt.Key_Left:
             self.prev_move()
-        elif event.key() == Qt.Key_Right:
+        elif key == Qt.Key_Right:
             self.next_move()
         else:
             super().keyPressEvent(event)
@@ -1193,9 +1495,26 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         self.arrow_button.setText(f"Arrows: {'✅' if self.show_arrows else '❌'}")
         self.update_display()
 
+    def legal_targets(self, square):
+        """
+        @brief Get the destination squares of the legal moves from a square.
+
+        Moves are generated once per position and indexed by origin square.
+        @param square The square of the picked-up piece.
+        @return List of target squares.
+        """
+        board = self.current_board
+        key = (board.board_fen(), board.turn, board.castling_rights, board.ep_square)
+        if key != self._legal_key:
+            self._legal_key = key
+            self._legal_targets = {}
+            for move in board.legal_moves:
+                self._legal_targets.setdefault(move.from_square, []).append(move.to_square)
+        return self._legal_targets.get(square, [])
+
     def mousePressEvent(self, event):
         """Handle mouse press events for piece movement."""
-        pos = event.localPos()
+        pos = event.position()
         board_size = 8 * self.board_display.square_size
         global_offset = (self.board_display.width() - board_size) / 2
 
@@ -1203,17 +1522,9 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         if not self.is_within_board(pos):
             return super().mousePressEvent(event)
 
-        # Calculate square coordinates
-        adjusted_x = pos.x() - global_offset
-        adjusted_y = pos.y() - global_offset
-
         # Determine clicked square
-        if self.flipped:
-            file_idx = 7 - int(adjusted_x // self.board_display.square_size)
-            rank_idx = int(adjusted_y // self.board_display.square_size)
-        else:
-            file_idx = int(adjusted_x // self.board_display.square_size)
-            rank_idx = 7 - int(adjusted_y // self.board_display.square_size)
+        file_idx, rank_idx = self.board_display.board_coords(
+            pos.x() - global_offset, pos.y() - global_offset, self.flipped, self.board_display._inv_square_size)
         square = chess.square(file_idx, rank_idx)
         piece = self.current_board.piece_at(square)
 
@@ -1222,7 +1533,7 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
             self.arrow_start = square
             self.current_arrow = (square, square)
             event.accept()
-            self.board_display.repaint()
+            self.board_display.update()
             return
         
         # Left-click on an empty square: clear drawn arrows and circles (added back)
@@ -1230,41 +1541,38 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
             self.arrows = []
             self.user_circles = set()
             self.board_display.user_circles = self.user_circles
-            self.board_display.repaint()
+            self.board_display.update()
 
         # Handle left-click for piece movement
         if event.button() == Qt.LeftButton and piece:
             # Create drag object
             drag = QDrag(self.board_display)  # Changed to use board_display as parent
-            mime_data = QMimeData()
-            
             # Store square data in mime data
-            mime_data.setText(str(square))
-            drag.setMimeData(mime_data)
+            drag.setMimeData(square_mime_data(square))
             
-            # Set drag pixmap
-            pixmap = self.get_piece_pixmap(piece)
+            # Set drag pixmap, composed once for the whole pickup
+            pixmap = self.drag_pixmap = self.get_piece_pixmap(piece)
             drag.setPixmap(pixmap)
             drag.setHotSpot(QPoint(pixmap.width() // 2, pixmap.height() // 2))
             
             # Highlight legal moves
-            legal_moves = [move for move in self.current_board.legal_moves if move.from_square == square]
-            self.board_display.highlight_moves = [move.to_square for move in legal_moves]
-            self.board_display.repaint()
+            self.board_display.highlight_moves = self.legal_targets(square)
+            self.board_display.update()
             
             # Execute drag
             result = drag.exec(Qt.MoveAction)
             
             # Reset highlights
+            self.drag_pixmap = None
             self.board_display.highlight_moves = []
-            self.board_display.repaint()
+            self.board_display.update()
             
             return
 
         super().mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
-        pos = event.localPos()
+        pos = event.position()
         board_size = 8 * self.board_display.square_size
         global_offset = (self.board_display.width() - board_size) / 2
 
@@ -1272,14 +1580,8 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
             if pos.x() < global_offset or pos.x() > global_offset + board_size or \
             pos.y() < global_offset or pos.y() > global_offset + board_size:
                 return
-            adjusted_x = pos.x() - global_offset
-            adjusted_y = pos.y() - global_offset
-            if self.flipped:
-                file_idx = 7 - int(adjusted_x // self.board_display.square_size)
-                rank_idx = int(adjusted_y // self.board_display.square_size)
-            else:
-                file_idx = int(adjusted_x // self.board_display.square_size)
-                rank_idx = 7 - int(adjusted_y // self.board_display.square_size)
+            file_idx, rank_idx = self.board_display.board_coords(
+                pos.x() - global_offset, pos.y() - global_offset, self.flipped, self.board_display._inv_square_size)
             square = chess.square(file_idx, rank_idx)
             self.current_arrow = (self.arrow_start, square)
             self.board_display.update()
@@ -1321,19 +1623,18 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
                 self.arrows.append(self.current_arrow)
             self.current_arrow = None
             self.arrow_start = None
-            self.board_display.repaint()
+            self.board_display.update()
             return
 
         if self.dragging:
-            pos = event.localPos()
-            adjusted_pos = pos - QPointF(global_offset, global_offset)
-            if self.flipped:
-                file_idx = 7 - int(adjusted_pos.x() // self.board_display.square_size)
-                rank_idx = int(adjusted_pos.y() // self.board_display.square_size)
-            else:
-                file_idx = int(adjusted_pos.x() // self.board_display.square_size)
-                rank_idx = 7 - int(adjusted_pos.y() // self.board_display.square_size)
-            drop_square = chess.square(file_idx, rank_idx)
+            pos = event.position()
+            adjusted_x = pos.x() - global_offset
+            adjusted_y = pos.y() - global_offset
+            file_idx, rank_idx = self.board_display.board_coords(
+                adjusted_x, adjusted_y, self.flipped, self.board_display._inv_square_size)
+            on_board = adjusted_x >= 0 and adjusted_y >= 0 and 0 <= file_idx < 8 and 0 <= rank_idx < 8
+            # Dropping off the board maps to the start square, which is never a legal move
+            drop_square = chess.square(file_idx, rank_idx) if on_board else self.drag_start_square
             move = chess.Move(self.drag_start_square, drop_square)
             if move in self.current_board.legal_moves:
                 self.current_board.push(move)
@@ -1355,6 +1656,7 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
             self.drag_start_square = None
             self.drag_current_pos = None
             self.drag_offset = None
+            self.drag_pixmap = None
             self.board_display.drag_info = {"dragging": False}
             self.board_display.highlight_moves = []
             self.update_display()
@@ -1364,51 +1666,54 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
 
     def update_live_eval(self):
         """
-        @brief Get and store evaluation for the current position in live games.
+        @brief Start evaluating the current position of a live game on a worker thread.
         """
         if not self.current_board.is_game_over():
-            info = self.engine.analyse(
-                self.current_board,
-                chess.engine.Limit(time=self.settings.value("analysis/postime", 0.1, float)),
-                multipv=1
+            ply = self.current_move_index - 1
+            move = self.moves[ply] if 0 <= ply < len(self.moves) else None
+            game_id = self.game_id
+            self.live_eval_task = run_engine_task(
+                call_locked,
+                self.engine,
+                self.engine.analyse,
+                self.current_board.copy(),
+                chess.engine.Limit(time=self._cfg["postime"]),
+                multipv=1,
+                on_finished=lambda info: self.live_eval_ready(game_id, ply, move, info),
+                on_failed=lambda error: print(f"Engine error: {error!r}")
             )
-            eval_score = self.eval_to_cp(info[0]["score"].relative)
-            if not hasattr(self, 'move_evaluations_scores'):
-                self.move_evaluations_scores = []
-            if self.current_move_index - 1 < len(self.move_evaluations_scores):
-                self.move_evaluations_scores[self.current_move_index - 1] = eval_score
-            else:
-                self.move_evaluations_scores.append(eval_score)
-            self.white_moves = [self.move_evaluations_scores[i] for i in range(0, len(self.move_evaluations_scores), 2)]
-            self.black_moves = [self.move_evaluations_scores[i] for i in range(1, len(self.move_evaluations_scores), 2)]
-            self.eval_graph.update_graph(self.white_moves, self.black_moves)
-
-    def get_piece_svg(self, piece):
-        """Generate SVG for a single piece."""
-        size = self.width() // 8  # size of one square
-        piece_svg = chess.svg.piece(piece, size=size)
-        return piece_svg
-    
+
+    def live_eval_ready(self, game_id, ply, move, info):
+        """
+        @brief Store a live game evaluation and redraw the graph.
+        @param game_id The game_id the search was started for.
+        @param ply Index of the move the evaluated position follows.
+        @param move That move, to tell whether it was taken back meanwhile.
+        @param info The engine's multipv info list.
+        """
+        if game_id is not self.game_id or ply >= len(self.moves) or (move is not None and self.moves[ply] != move):
+            return
+        eval_score = self.eval_to_cp(info[0]["score"].relative)
+        if not hasattr(self, 'move_evaluations_scores'):
+            self.move_evaluations_scores = []
+        # Searches may finish out of order; hold the place of one still running
+        while len(self.move_evaluations_scores) < ply:
+            self.move_evaluations_scores.append(0)
+        if ply < len(self.move_evaluations_scores):
+            self.move_evaluations_scores[ply] = eval_score
+        else:
+            self.move_evaluations_scores.append(eval_score)
+        self.white_moves = [self.move_evaluations_scores[i] for i in range(0, len(self.move_evaluations_scores), 2)]
+        self.black_moves = [self.move_evaluations_scores[i] for i in range(1, len(self.move_evaluations_scores), 2)]
+        self.eval_graph.update_graph(self.white_moves, self.black_moves)
+
     def get_piece_pixmap(self, piece):
-        piece_svg = self.get_piece_svg(piece)
-        pixmap = QPixmap(100, 100)  # Fixed size for drag image
-        pixmap.loadFromData(piece_svg.encode(), 'SVG')
-        
-        # Handle failed loads
-        if pixmap.isNull():
-            print(f"Error: Failed to load image for piece")
-            pixmap = QPixmap(self.board_display.square_size, self.board_display.square_size)
-            pixmap.fill(Qt.transparent)
-            painter = QPainter(pixmap)
-            painter.setPen(Qt.black)
-            painter.drawText(pixmap.rect(), Qt.AlignCenter, piece.symbol())
-            painter.end()
-            
-        # Scale using the board display's actual square size
-        square_size = self.board_display.square_size
-        return pixmap.scaled(square_size, square_size, 
-                           Qt.KeepAspectRatio, 
-                           Qt.SmoothTransformation)
+        """
+        @brief Get the drag image for a piece at the board's current square size.
+        @param piece The chess piece.
+        @return A cached QPixmap of the piece.
+        """
+        return piece_pixmap(piece.symbol(), max(1, int(self.board_display.square_size)))
 
     def save_game_with_notes(self):
         """Save the game PGN with move notes."""
@@ -1417,13 +1722,10 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         if hasattr(self, 'hdrs') and self.hdrs:
             for key, value in self.hdrs.items():
                 game.headers[key] = value
+        # Notes live in move_notes keyed by ply, the same store the move labels read
         for i, move in enumerate(self.moves):
             node = node.add_variation(move)
-            move_widget = self.move_list.itemAt(i // 2).widget()
-            if i % 2 == 0:
-                note = move_widget.white_label.note
-            else:
-                note = move_widget.black_label.note
+            note = self.move_notes.get(i, "")
             if note:
                 node.comment = note
         return str(game)
@@ -1445,8 +1747,8 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
             # Scale skill level from 6-20 for ELO range 1320-3000
             skill_level = min(20, max(6, (user_elo - 1320) // 84))
         
-        # Configure the engine
-        self.engine.configure({
+        # Configure the engine; live evaluation may still be using it
+        call_locked(self.engine, self.engine.configure, {
             "UCI_LimitStrength": True,
             "UCI_Elo": user_elo,
             "Skill Level": skill_level,
@@ -1461,8 +1763,10 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
         import random
         
         self.is_live_game = True
+        self.game_id = object()  # Results for the previous game are now stale
         self.current_board = chess.Board()
         self.moves = []
+        self.boards_by_ply = []
         self.current_move_index = 0
         self.move_evaluations = []
         self.move_evaluations_scores = []
@@ -1481,40 +1785,80 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
     def make_computer_move(self):
         """
         @brief Have the computer make its move.
+
+        The engine searches on a worker thread so the board stays responsive;
+        the reply is applied in computer_move_ready.
         """
-        if not self.current_board.is_game_over():
-            result = self.engine.play(
-                self.current_board,
-                chess.engine.Limit(time=1.0)
-            )
-            if result.move:
-                self.current_board.push(result.move)
-                self.moves.append(result.move)
-                self.current_move_index += 1
-                self.update_live_eval()
-                self.update_display()
-                self.check_game_over()
+        if self.computer_thinking or self.current_board.is_game_over():
+            return
+        self.computer_thinking = True
+        self.computer_task = run_engine_task(
+            call_locked,
+            self.engine,
+            self.engine.play,
+            self.current_board.copy(),
+            chess.engine.Limit(time=1.0),
+            on_finished=lambda result, fen=self.current_board.fen(): self.computer_move_ready(result, fen),
+            on_failed=self.computer_move_failed
+        )
+
+    def computer_move_ready(self, result, fen):
+        """
+        @brief Apply the engine's reply if the position it searched is still on the board.
+        @param result The chess.engine.PlayResult.
+        @param fen FEN of the position the engine was given.
+        """
+        self.computer_thinking = False
+        self.computer_task = None
+        self.computer_move_retries = 0
+        if self.current_board.fen() != fen:
+            # The board changed while the engine was thinking; ask again for the position now shown
+            if self.current_move_index == len(self.moves) and self.current_board.turn == self.computer_color:
+                QTimer.singleShot(0, self.make_computer_move)
+            return
+        if result.move:
+            self.current_board.push(result.move)
+            self.moves.append(result.move)
+            self.current_move_index += 1
+            self.update_live_eval()
+            self.update_display()
+            self.check_game_over()
+
+    def computer_move_failed(self, error):
+        """
+        @brief Retry the computer move when its search was interrupted, or report the error.
+        @param error The exception raised by engine.play.
+        """
+        self.computer_thinking = False
+        self.computer_task = None
+        if not hasattr(self, 'computer_color') or self.current_board.turn != self.computer_color:
+            self.computer_move_retries = 0
+            return
+        # Another engine command can cancel a running search; a dead engine or a bad path cannot be retried
+        recoverable = (isinstance(error, RECOVERABLE_ENGINE_ERRORS)
+                       and not isinstance(error, chess.engine.EngineTerminatedError))
+        if recoverable and self.computer_move_retries < COMPUTER_MOVE_RETRIES:
+            self.computer_move_retries += 1
+            QTimer.singleShot(500, self.make_computer_move)
+            return
+        self.computer_move_retries = 0
+        QMessageBox.critical(self, "Engine Error", f"The computer could not make its move:\n{error!r}")
 
     def check_game_over(self):
         """
         @brief Check if the game is over and show appropriate dialog.
         """
-        if self.current_board.is_game_over() and not self.last_shown_game_over:
+        if self.last_shown_game_over:
+            return
+        # One pass through python-chess's termination logic instead of a predicate cascade
+        outcome = self.current_board.outcome()
+        if outcome is not None:
             self.last_shown_game_over = True
-            result = ""
-            if self.current_board.is_checkmate():
-                winner = "Black" if self.current_board.turn == chess.WHITE else "White"
+            if outcome.termination == chess.Termination.CHECKMATE:
+                winner = "White" if outcome.winner == chess.WHITE else "Black"
                 result = f"Checkmate! {winner} wins!"
-            elif self.current_board.is_stalemate():
-                result = "Game Over - Stalemate!"
-            elif self.current_board.is_insufficient_material():
-                result = "Game Over - Draw by insufficient material!"
-            elif self.current_board.is_fifty_moves():
-                result = "Game Over - Draw by fifty move rule!"
-            elif self.current_board.is_repetition():
-                result = "Game Over - Draw by repetition!"
             else:
-                result = "Game Over - Draw!"
+                result = GAME_OVER_MESSAGES.get(outcome.termination, "Game Over - Draw!")
 
             QMessageBox.information(self, "Game Over", result)
             self.analyze_button.setVisible(True)
@@ -1532,21 +1876,25 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
             max=len(self.moves)
         )
 
-        self.engine.configure({
+        loading_bar = self.loading_bar
+
+        def analysis_done(success):
+            loading_bar.close()
+            if not success:
+                return
+            self.update_display()
+            self.update_game_summary()
+            QMessageBox.information(
+                self,
+                "Analysis Complete",
+                f"Game analyzed!\nWhite Accuracy: {self.white_accuracy}%\nBlack Accuracy: {self.black_accuracy}%"
+            )
+
+        self.analyze_all_moves(analysis_done, options={
             "UCI_LimitStrength": False,
             "Skill Level": 20
         })
 
-        self.analyze_all_moves()
-        self.update_display()
-        self.update_game_summary()
-        self.loading_bar.close()
-        QMessageBox.information(
-            self,
-            "Analysis Complete",
-            f"Game analyzed!\nWhite Accuracy: {self.white_accuracy}%\nBlack Accuracy: {self.black_accuracy}%"
-        )
-
     def get_opening_from_moves(self, board_or_moves):
         """
         Given either a python-chess board or a list of moves,
@@ -1573,18 +1921,4 @@ Black (Accuracy: {self.black_accuracy}): Excellent: {black_excellent}✅, Good:
                 moves.append(san)
                 temp_board.push(move)
         
-        current_sequence = " ".join(moves)
-        
-        best_opening = None
-        best_length = 0
-        global OPENINGS_DB
-        for opening in OPENINGS_DB:
-            # Clean the PGN field to remove move numbers
-            opening_moves = clean_pgn_moves(opening["pgn"])
-            move_count = len(opening_moves.split())
-            # If the current sequence starts with this opening's moves and it is longer than the best match so far:
-            if current_sequence.startswith(opening_moves) and move_count > best_length:
-                best_opening = opening
-                best_length = move_count
-
-        return best_opening
\ No newline at end of file
+        return find_opening(moves)
\ No newline at end of file
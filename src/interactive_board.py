@@ -1,19 +1,86 @@
 import sys
-import os
+import threading
+from collections import deque, OrderedDict
+import math
 import chess
 import chess.engine
 import chess.svg
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QMenu, QLineEdit, QDialog
+from PySide6.QtSvg import QSvgRenderer
 from PySide6.QtSvgWidgets import QSvgWidget
-from PySide6.QtCore import Qt, QByteArray, QPointF, QMimeData, QPoint
-from PySide6.QtGui import QPainter, QIcon, QColor, QAction, QPen, QPixmap, QDrag
-from dialogs import PromotionDialog
+from PySide6.QtCore import Qt, QPointF, QPoint, QRectF, QLineF
+from PySide6.QtGui import QPainter, QColor, QAction, QPen, QPixmap, QDrag, QPolygonF, QPainterPath
+from dialogs import PromotionDialog, app_icon
+from board_svg import render_board_svg, piece_pixmap, square_mime_data, dropped_square, SQUARE_MIME_TYPE
+from engine_worker import EngineTaskSignals, watch_future
+from engine_pool import EnginePool
+
+# Oldest undo entries are dropped beyond this many
+UNDO_LIMIT = 256
+# Analyzed positions remembered per board; least recently used ones are dropped first
+ANALYSIS_CACHE_LIMIT = 1000
+
+# Rasterized boards kept for quick revisits (undo, flip back); each is a few MB
+BOARD_PIXMAP_LIMIT = 8
+_BOARD_PIXMAPS = OrderedDict()  # (id(svg bytes), board_size, dpr) -> (svg bytes, QPixmap)
+
+# Arrow colors for the engine lines, best line first
+_ARROW_COLORS = ("#00ff00", "#007000", "#003000")
+
+# chess.svg board geometry in viewBox units: a 15 unit coordinate margin around 8 squares
+_SVG_MARGIN = 15
+_SVG_FULL_SIZE = 8 * chess.svg.SQUARE_SIZE + 2 * _SVG_MARGIN
+
+# (square_size, orientation) -> tuple of 64 square centres
+_SQUARE_CENTERS = {}
+
+def _square_centers(square_size, orientation):
+    """
+    @brief Get the widget-space centre of every square as drawn by chess.svg, indexed by square.
+    @param square_size Size of one square of the widget grid in pixels.
+    @param orientation chess.WHITE or chess.BLACK (side at the bottom).
+    @return Tuple of 64 QPointF.
+    """
+    key = (square_size, orientation)
+    centers = _SQUARE_CENTERS.get(key)
+    if centers is None:
+        scale = 8 * square_size / _SVG_FULL_SIZE
+        centers = []
+        for sq in chess.SQUARES:
+            file = chess.square_file(sq)
+            rank = 7 - chess.square_rank(sq)
+            if orientation == chess.BLACK:
+                file = 7 - file
+                rank = 7 - rank
+            centers.append(QPointF((_SVG_MARGIN + (file + 0.5) * chess.svg.SQUARE_SIZE) * scale,
+                                   (_SVG_MARGIN + (rank + 0.5) * chess.svg.SQUARE_SIZE) * scale))
+        centers = _SQUARE_CENTERS[key] = tuple(centers)
+    return centers
+
+def _arrow_shape(tail, head, square_px):
+    """
+    @brief Build the shaft and head of an arrow the way chess.svg draws it.
+    @param tail QPointF centre of the tail square.
+    @param head QPointF centre of the head square.
+    @param square_px Rendered square size in pixels.
+    @return Tuple (QLineF shaft, QPolygonF head).
+    """
+    marker_size = 0.75 * square_px
+    marker_margin = 0.1 * square_px
+    dx, dy = head.x() - tail.x(), head.y() - tail.y()
+    hypot = math.hypot(dx, dy)
+    shaft_x = head.x() - dx * (marker_size + marker_margin) / hypot
+    shaft_y = head.y() - dy * (marker_size + marker_margin) / hypot
+    tip = QPointF(head.x() - dx * marker_margin / hypot, head.y() - dy * marker_margin / hypot)
+    half_x, half_y = dy * 0.5 * marker_size / hypot, dx * 0.5 * marker_size / hypot
+    polygon = QPolygonF([tip, QPointF(shaft_x + half_x, shaft_y - half_y), QPointF(shaft_x - half_x, shaft_y + half_y)])
+    return QLineF(tail, QPointF(shaft_x, shaft_y)), polygon
 
 class ChessBoard(QSvgWidget):
     def __init__(self, engine : chess.engine = None, threads=None, multipv=None, mem=None, time=None, depth=None, parent=None):
         """
         @brief Initialize the chess board widget.
-        @param engine The chess engine instance.
+        @param engine The EnginePool used for analysis.
         @param threads Number of threads.
         @param multipv Number of analysis lines.
         @param mem Memory allocation for engine.
@@ -33,45 +100,104 @@ class ChessBoard(QSvgWidget):
         self.board_size = self.square_size * 8
         self.setFixedSize(self.board_size, self.board_size)
         self.board_orientation = chess.WHITE
-        self.move_stack = []
+        self._map_pos = self._map_pos_white
+        self.square_centers = _square_centers(self.square_size, self.board_orientation)  # Refreshed on flip
+        self.move_stack = deque(maxlen=UNDO_LIMIT)  # Undo entries: ('move', move) or ('piece', square, previous piece)
         self.engine = engine
+        self.analysis_cache = OrderedDict()  # position_key() -> analyse() result, LRU bounded by ANALYSIS_CACHE_LIMIT
+        self._analysis_task = None  # Signals of the search in flight, see watch_future
+        self._analysis_stop = None  # threading.Event that ends the search in flight
         self.best_moves = []
         self.selected_square = None
         self.legal_moves = []
         self.highlight_moves = []  # NEW: stores squares to highlight for legal moves
+        self._overlay_pixmap = None  # Pre-rendered highlight circles, see set_highlight_moves
+        self._piece_menu = None  # Edit-mode piece menu, built on first right-click
+        self._menu_square = None
         self.dragging = False
         self.drag_start_square = None
         self.drag_current_pos = None
         self.drag_offset = None
         self.game_tab = parent
+        self._last_svg_bytes = None  # Cached SVG currently on display
+        self._last_render_key = None  # Position/orientation shown by the last update_board
+        self.analysis_arrows = []  # (tail, head, QColor) from the last analysis
+        self._arrow_shapes = []  # Painted (shaft, head, color) for analysis_arrows
+        self._arrow_width = 0
+        self._legal_cache = None  # frozenset of legal moves, reset by update_board
+        self._legal_targets = {}  # from_square -> [to_square], built with _legal_cache
+        self._board_pixmap = QPixmap()  # Rasterized board currently shown, see load_svg_bytes
         self.setAcceptDrops(True)  # Add this line to explicitly enable drops
+        for symbol in "PNBRQKpnbrqk":
+            self.get_piece_pixmap(chess.Piece.from_symbol(symbol))  # Warm the shared cache
         self.update_board()
 
-    def update_board(self):
+    def update_board(self, force=False):
         """
         @brief Render and update the board display.
+        @param force Re-render even if the position and orientation are unchanged.
         """
+        key = self.position_key() + (self.board_orientation,)
+        if key == self._last_render_key and not force:
+            self.update()
+            return
+        self._last_render_key = key
+        self._legal_cache = None  # Every position change goes through here
+        self.cancel_analysis()  # A search for the old position is no longer worth finishing
+        self.analysis_arrows = []
+        self._arrow_shapes = []
         # Get king square if in check
         check = self.board.king(self.board.turn) if self.board.is_check() else None
         
-        board_svg = chess.svg.board(
-            self.board,
-            size=self.board_size,
-            orientation=self.board_orientation,
-            check=check  # Add check parameter
-        )
-        self.load(QByteArray(board_svg.encode("utf-8")))
+        self.load_svg_bytes(render_board_svg(key[0], self.board_orientation, check))
         self.update()
-        # Always update parent's FEN display
-        if self.parent() and hasattr(self.parent(), 'fen_input'):
-            self.parent().fen_input.setText(self.board.fen())
+        # Update the editor's FEN display; parent() is only the layout container
+        fen_input = getattr(self.game_tab, 'fen_input', None)
+        if fen_input is not None:
+            fen = self.board.fen()
+            # Compared with the field itself, so text the user typed over is still replaced
+            if fen != fen_input.text():  # Skip the QLineEdit relayout when nothing changed
+                fen_input.setText(fen)
+
+    def position_key(self):
+        """
+        @brief Identify the current position independently of the move counters.
+        @return Tuple of piece placement, side to move, castling rights and en passant square.
+        """
+        board = self.board
+        return (board.board_fen(), board.turn, board.castling_rights, board.ep_square)
+
+    def legal_move_set(self):
+        """
+        @brief Get the legal moves of the current position, generated once per position.
+        @return frozenset of chess.Move.
+        """
+        if self._legal_cache is None:
+            self._legal_cache = frozenset(self.board.legal_moves)
+            self._legal_targets = {}
+            for move in self._legal_cache:
+                self._legal_targets.setdefault(move.from_square, []).append(move.to_square)
+        return self._legal_cache
+
+    def legal_targets(self, square):
+        """
+        @brief Get the destination squares of the legal moves starting on a square.
+        @param square The square of the picked-up piece.
+        @return List of target squares (shared with the cache, do not modify).
+        """
+        self.legal_move_set()
+        return self._legal_targets.get(square, [])
 
     def flip_board(self):
         """
         @brief Flip the board orientation.
         """
         self.board_orientation = chess.BLACK if self.board_orientation == chess.WHITE else chess.WHITE
+        self._map_pos = self._map_pos_white if self.board_orientation == chess.WHITE else self._map_pos_black
+        self.square_centers = _square_centers(self.square_size, self.board_orientation)
+        self.set_highlight_moves(self.highlight_moves)
         self.update_board()
+        self.build_arrow_shapes()
 
     def set_piece(self, square, piece_symbol):
         """
@@ -79,12 +205,14 @@ class ChessBoard(QSvgWidget):
         @param square The target square.
         @param piece_symbol The piece symbol; empty string removes the piece.
         """
-        self.move_stack.append(self.board.fen())
+        self.move_stack.append(('piece', square, self.board.piece_at(square)))
+        # BaseBoard's setters leave the pushed moves in place so undo can still pop them;
+        # edits are always undone before the move that preceded them.
         if piece_symbol == '':
-            self.board.remove_piece_at(square)
+            chess.BaseBoard.remove_piece_at(self.board, square)
         else:
             piece = chess.Piece.from_symbol(piece_symbol)
-            self.board.set_piece_at(square, piece)
+            chess.BaseBoard.set_piece_at(self.board, square, piece)
         self.best_moves = []
         self.update_board()
 
@@ -95,58 +223,179 @@ class ChessBoard(QSvgWidget):
         """
         try:
             self.board.set_fen(fen)
+            self.move_stack.clear()  # Square diffs of the old position must not replay onto the new one
             self.best_moves = []
             self.update_board()
         except ValueError:
-            self.parent().status_label.setText("Invalid FEN")
+            self.game_tab.status_label.setText("Invalid FEN")
 
     def undo_move(self):
         """
         @brief Undo the last move.
         """
-        if self.move_stack:
-            fen = self.move_stack.pop()
-            self.board.set_fen(fen)
+        while self.move_stack:
+            entry = self.move_stack.pop()
+            if entry[0] == 'piece':
+                _, square, piece = entry
+                if piece is None:
+                    chess.BaseBoard.remove_piece_at(self.board, square)
+                else:
+                    chess.BaseBoard.set_piece_at(self.board, square, piece)
+            elif self.board.move_stack:
+                self.board.pop()
+            else:
+                continue  # Move history was replaced by a FEN load; nothing left to take back
             self.best_moves = []
             self.update_board()
+            break
 
     def analyze_position(self):
         """
-        @brief Analyze the current board position using the engine.
+        @brief Analyze the current board position using the engine pool.
+
+        The search runs on a pool thread; show_analysis draws the result when it arrives.
         """
-        try:
-            result = self.engine.analyse(self.board, chess.engine.Limit(time=self.time), multipv=self.multipv)
-        except Exception as e:
-            print(f"Engine error: {e}")
-            if hasattr(self.parent(), 'engine_path'):
-                try:
-                    self.engine = chess.engine.SimpleEngine.popen_uci(self.parent().engine_path)
-                    result = self.engine.analyse(self.board, chess.engine.Limit(time=self.time), multipv=self.multipv)
-                except Exception as e:
-                    print(f"Failed to restart engine: {e}")
-                    return
-            else:
-                print("No engine path available for restart")
-                return
+        # Keyed without the move counters, so transpositions and undo/redo hit the cache
+        key = self.position_key()
+        result = self.analysis_cache.get(key)
+        if result is not None:
+            self.analysis_cache.move_to_end(key)
+            self.show_analysis(result)
+            return
+        if self._analysis_task is not None or self.engine is None:
+            return  # One search at a time; the button is disabled meanwhile
+        if not self.engine.available():
+            self.game_tab.status_label.setText("No engine available")
+            return
+        self.set_analyze_enabled(False)
+        stop = self._analysis_stop = threading.Event()
+        signals = EngineTaskSignals()
+        # Each completed depth is drawn as it arrives; the final result replaces it
+        signals.progress.connect(lambda result, key=key: self.analysis_progress(key, result), Qt.QueuedConnection)
+        future = self.engine.submit(self.board, chess.engine.Limit(time=self.time), self.multipv,
+                                    on_info=signals.progress.emit, stop=stop)
+        self._analysis_task = watch_future(
+            future,
+            on_finished=lambda result, key=key: self.analysis_ready(key, result, stop),
+            on_failed=self.analysis_failed,
+            signals=signals
+        )
 
-        # Continue with existing analysis code
+    def cancel_analysis(self):
+        """
+        @brief Ask a running search to stop early; its partial result is not cached.
+        """
+        if self._analysis_stop is not None:
+            self._analysis_stop.set()
+
+    def analysis_progress(self, key, result):
+        """
+        @brief Show an intermediate depth of a running search.
+        @param key position_key() of the analyzed position.
+        @param result Snapshot of the engine's multipv info list.
+        """
+        if self._analysis_task is not None and self.position_key() == key:
+            self.show_analysis(result)
+
+    def analysis_ready(self, key, result, stop):
+        """
+        @brief Cache a finished analysis and show it if its position is still on the board.
+        @param key position_key() of the analyzed position.
+        @param result The engine's multipv info list.
+        @param stop The job's stop event; a stopped search is shown but not cached.
+        """
+        self._analysis_task = None
+        self._analysis_stop = None
+        self.set_analyze_enabled(True)
+        if not stop.is_set():
+            self.analysis_cache[key] = result
+            if len(self.analysis_cache) > ANALYSIS_CACHE_LIMIT:
+                self.analysis_cache.popitem(last=False)
+        if self.position_key() == key:
+            self.show_analysis(result)
+
+    def analysis_failed(self, error):
+        """
+        @brief Report a failed analysis and allow another attempt.
+        @param error The exception raised on the worker thread.
+        """
+        self._analysis_task = None
+        self._analysis_stop = None
+        self.set_analyze_enabled(True)
+        self.game_tab.status_label.setText(f"Engine error: {error}")
+
+    def set_analyze_enabled(self, enabled):
+        """
+        @brief Enable or disable the owning editor's Analyze button, if any.
+        @param enabled True to enable.
+        """
+        button = getattr(self.game_tab, 'analyze_button', None)
+        if button is not None:
+            button.setEnabled(enabled)
+
+    def show_analysis(self, result):
+        """
+        @brief Draw the best-move arrows for an analysis result.
+        @param result The engine's multipv info list.
+        """
+        result = [info for info in result if info.get('pv')]  # Lines the engine has not reached yet have no pv
         self.best_moves = [info['pv'][0] for info in result]
-        arrows = []
-        for i, pv in enumerate(result, 1):
-            move = pv["pv"][0]
-            color = "#00ff00" if i == 1 else "#007000" if i == 2 else "#003000"
-            arrows.append(chess.svg.Arrow(
-                tail=move.from_square,
-                head=move.to_square,
-                color=color
-            ))
-        
-        board_svg = chess.svg.board(
-            self.board,
-            arrows=arrows,
-            orientation=self.board_orientation,
-        )
-        self.load(QByteArray(board_svg.encode("utf-8")))
+        last = len(_ARROW_COLORS) - 1
+        # Arrows are painted over the cached board instead of re-rendering the SVG
+        self.analysis_arrows = [
+            (info["pv"][0].from_square, info["pv"][0].to_square, QColor(_ARROW_COLORS[min(i, last)]))
+            for i, info in enumerate(result)
+        ]
+        self.build_arrow_shapes()
+        self.update()
+
+    def build_arrow_shapes(self):
+        """
+        @brief Precompute the painted geometry of the analysis arrows for the current orientation.
+        """
+        centers = self.square_centers
+        square_px = self.board_size * chess.svg.SQUARE_SIZE / _SVG_FULL_SIZE
+        self._arrow_shapes = [
+            _arrow_shape(centers[tail], centers[head], square_px) + (color,)
+            for tail, head, color in self.analysis_arrows
+            if tail != head
+        ]
+        self._arrow_width = square_px * 0.2
+
+    def load_svg_bytes(self, svg_bytes):
+        """
+        @brief Show rendered SVG bytes, parsing and rasterizing each distinct SVG only once.
+        @param svg_bytes QByteArray returned by render_board_svg.
+        """
+        if svg_bytes is self._last_svg_bytes:
+            return
+        self._last_svg_bytes = svg_bytes
+        dpr = self.devicePixelRatioF()
+        # The entry keeps svg_bytes alive, so its id cannot be reused by another SVG
+        key = (id(svg_bytes), self.board_size, dpr)
+        entry = _BOARD_PIXMAPS.get(key)
+        if entry is None:
+            entry = _BOARD_PIXMAPS[key] = (svg_bytes, self.rasterize_board(svg_bytes, dpr))
+            if len(_BOARD_PIXMAPS) > BOARD_PIXMAP_LIMIT:
+                _BOARD_PIXMAPS.popitem(last=False)
+        else:
+            _BOARD_PIXMAPS.move_to_end(key)
+        self._board_pixmap = entry[1]
+
+    def rasterize_board(self, svg_bytes, dpr):
+        """
+        @brief Parse an SVG and render it into a board-sized pixmap.
+        @param svg_bytes QByteArray holding the SVG.
+        @param dpr Device pixel ratio of the target screen.
+        @return The rasterized QPixmap.
+        """
+        pixmap = QPixmap(int(self.board_size * dpr), int(self.board_size * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        QSvgRenderer(svg_bytes).render(painter, QRectF(0, 0, self.board_size, self.board_size))
+        painter.end()
+        return pixmap
 
     def map_position_to_square(self, pos):
         """
@@ -154,24 +403,35 @@ class ChessBoard(QSvgWidget):
         @param pos QPointF representing the position.
         @return Tuple (file_idx, rank_idx).
         """
-        # pos is a QPointF in widget coordinates.
-        if self.board_orientation == chess.WHITE:
-            file_idx = int(pos.x() // self.square_size)
-            rank_idx = 7 - int(pos.y() // self.square_size)
-        else:  # For flipped board (BLACK orientation)
-            file_idx = 7 - int(pos.x() // self.square_size)
-            rank_idx = int(pos.y() // self.square_size)
-        return file_idx, rank_idx
+        # Dispatch once through the mapper matching the current orientation
+        return self._map_pos(pos)
+
+    def _grid_index(self, coord):
+        """
+        @brief Map a widget x or y coordinate to a column or row of the drawn board, as _square_centers does.
+        @param coord Coordinate in pixels.
+        @return Index from the top left; the coordinate margin maps to -1 or 8.
+        """
+        return math.floor((coord * _SVG_FULL_SIZE / self.board_size - _SVG_MARGIN) / chess.svg.SQUARE_SIZE)
+
+    def _map_pos_white(self, pos):
+        """Map a widget coordinate to (file_idx, rank_idx) with White at the bottom."""
+        return self._grid_index(pos.x()), 7 - self._grid_index(pos.y())
+
+    def _map_pos_black(self, pos):
+        """Map a widget coordinate to (file_idx, rank_idx) with Black at the bottom."""
+        return 7 - self._grid_index(pos.x()), self._grid_index(pos.y())
 
     def mousePressEvent(self, event):
         """Handle mouse press events for piece movement and editing."""
         pos = event.position()
-        file_idx, rank_idx = self.map_position_to_square(pos)
-        square = chess.square(file_idx, rank_idx)
+        square = self.square_at_position(pos)
+        if square is None:
+            return  # Press on the coordinate margin
 
         # Handle right-click in edit mode
         if event.button() == Qt.RightButton and self.edit_mode:
-            self.show_piece_menu(event.globalPos(), square)
+            self.show_piece_menu(event.globalPosition().toPoint(), square)
             return
 
         # Regular piece movement logic
@@ -180,9 +440,7 @@ class ChessBoard(QSvgWidget):
             if piece:
                 # Create drag object
                 drag = QDrag(self)
-                mime_data = QMimeData()
-                mime_data.setText(str(square))
-                drag.setMimeData(mime_data)
+                drag.setMimeData(square_mime_data(square))
                 
                 # Set drag pixmap
                 pixmap = self.get_piece_pixmap(piece)
@@ -190,15 +448,14 @@ class ChessBoard(QSvgWidget):
                 drag.setHotSpot(QPoint(pixmap.width() // 2, pixmap.height() // 2))
                 
                 # Show legal moves
-                legal = [move for move in self.board.legal_moves if move.from_square == square]
-                self.highlight_moves = [move.to_square for move in legal]
+                self.set_highlight_moves(self.legal_targets(square))
                 self.update()
                 
                 # Execute drag
                 result = drag.exec(Qt.MoveAction | Qt.CopyAction)
                 
                 # Clear highlights
-                self.highlight_moves = []
+                self.set_highlight_moves([])
                 self.update()
                 return
 
@@ -212,12 +469,11 @@ class ChessBoard(QSvgWidget):
         """Handle mouse release events."""
         if self.dragging and self.drag_start_square is not None:
             pos = event.position()
-            file_idx, rank_idx = self.map_position_to_square(pos)
-            drop_square = chess.square(file_idx, rank_idx)
+            drop_square = self.square_at_position(pos)
             
-            move = chess.Move(self.drag_start_square, drop_square)
-            if move in self.board.legal_moves:
-                self.move_stack.append(self.board.fen())
+            move = chess.Move(self.drag_start_square, drop_square) if drop_square is not None else None
+            if move in self.legal_move_set():
+                self.move_stack.append(('move', move))
                 self.board.push(move)
                 self.best_moves = []
                 self.update_board()
@@ -226,12 +482,12 @@ class ChessBoard(QSvgWidget):
             self.drag_start_square = None
             self.drag_current_pos = None
             self.drag_offset = None
-            self.highlight_moves = []
+            self.set_highlight_moves([])
             self.update()
 
     def dragEnterEvent(self, event):
         """Handle drag enter events."""
-        if event.mimeData().hasText():
+        if event.mimeData().hasFormat(SQUARE_MIME_TYPE):
             event.setAccepted(True)
             event.accept()  # Explicitly accept the event
         else:
@@ -253,8 +509,8 @@ class ChessBoard(QSvgWidget):
         pos = event.position()
         to_square = self.square_at_position(pos)
         
-        if to_square is not None and event.mimeData().hasText():
-            from_square = int(event.mimeData().text())
+        from_square = dropped_square(event.mimeData())
+        if to_square is not None and from_square is not None:
             
             # Check if this is a pawn promotion move
             piece = self.board.piece_at(from_square)
@@ -268,8 +524,8 @@ class ChessBoard(QSvgWidget):
             else:
                 move = chess.Move(from_square, to_square)
             
-            if move in self.board.legal_moves:
-                self.move_stack.append(self.board.fen())
+            if move in self.legal_move_set():
+                self.move_stack.append(('move', move))
                 self.board.push(move)
                 self.best_moves = []
                 self.update_board()
@@ -294,64 +550,90 @@ class ChessBoard(QSvgWidget):
         @param pos The position where the menu is shown.
         @param square The board square.
         """
-        menu = QMenu(self)
-        pieces = {'Empty': '', 'White Pawn': 'P', 'White Knight': 'N', 'White Bishop': 'B', 'White Rook': 'R', 'White Queen': 'Q', 'White King': 'K', 'Black Pawn': 'p', 'Black Knight': 'n', 'Black Bishop': 'b', 'Black Rook': 'r', 'Black Queen': 'q', 'Black King': 'k'}
-
-        for name, symbol in pieces.items():
-            action = QAction(name, self)
-            action.triggered.connect(lambda checked, s=symbol: self.set_piece(square, s))
-            menu.addAction(action)
-
-        menu.exec(pos)
+        if self._piece_menu is None:
+            # Built once; the target square is rebound on every popup
+            self._piece_menu = QMenu(self)
+            pieces = {'Empty': '', 'White Pawn': 'P', 'White Knight': 'N', 'White Bishop': 'B', 'White Rook': 'R', 'White Queen': 'Q', 'White King': 'K', 'Black Pawn': 'p', 'Black Knight': 'n', 'Black Bishop': 'b', 'Black Rook': 'r', 'Black Queen': 'q', 'Black King': 'k'}
+            for name, symbol in pieces.items():
+                action = QAction(name, self)
+                action.setData(symbol)
+                self._piece_menu.addAction(action)
+            self._piece_menu.triggered.connect(self._on_piece_action)
+
+        self._menu_square = square
+        self._piece_menu.exec(pos)
+
+    def _on_piece_action(self, action):
+        """Place the piece chosen in the edit menu on the square it was opened for."""
+        self.set_piece(self._menu_square, action.data())
 
     def paintEvent(self, event):
         """
         @brief Paint the board and any overlays.
         @param event The paint event.
         """
-        super().paintEvent(event)
         painter = QPainter(self)
-        
-        # Draw highlighted moves
-        if self.highlight_moves:
+        # Blit the pre-rasterized board instead of re-rendering the SVG every paint
+        painter.drawPixmap(0, 0, self._board_pixmap)
+
+        # Draw highlighted moves, pre-rendered once per selection
+        if self._overlay_pixmap is not None:
+            painter.drawPixmap(0, 0, self._overlay_pixmap)
+
+        # Draw engine arrows
+        if self._arrow_shapes:
             painter.setRenderHint(QPainter.Antialiasing, True)
-            pen = QPen(QColor(0, 150, 0, 200), 2)
-            painter.setPen(pen)
-            brush = QColor(0, 150, 0, 100)
-            painter.setBrush(brush)
-            for sq in self.highlight_moves:
-                file = chess.square_file(sq)
-                rank = 7 - chess.square_rank(sq)
-                if self.board_orientation == chess.BLACK:
-                    file = 7 - file
-                    rank = 7 - rank
-                square_center_x = (file + 0.5) * self.square_size
-                square_center_y = (rank + 0.5) * self.square_size
-                center = QPointF(square_center_x, square_center_y)
-                radius = self.square_size / 5
-                painter.drawEllipse(center, radius, radius)
+            for shaft, head, color in self._arrow_shapes:
+                painter.setPen(QPen(color, self._arrow_width, Qt.SolidLine, Qt.FlatCap))
+                painter.drawLine(shaft)
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(color)
+                painter.drawPolygon(head)
 
         painter.end()
 
+    def set_highlight_moves(self, squares):
+        """
+        @brief Set the legal-move squares to highlight and pre-render their overlay.
+        @param squares List of target squares; empty clears the highlight.
+        """
+        self.highlight_moves = squares
+        if not squares:
+            self._overlay_pixmap = None
+            return
+        dpr = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.board_size * dpr), int(self.board_size * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        pen = QPen(QColor(0, 150, 0, 200), 2)
+        painter.setPen(pen)
+        brush = QColor(0, 150, 0, 100)
+        painter.setBrush(brush)
+        centers = self.square_centers
+        radius = self.square_size / 5
+        path = QPainterPath()  # All circles go to the paint engine in one call
+        for sq in squares:
+            path.addEllipse(centers[sq], radius, radius)
+        painter.drawPath(path)
+        painter.end()
+        self._overlay_pixmap = pixmap
+
     def get_piece_pixmap(self, piece):
         """
         @brief Get SVG pixmap for a chess piece.
         @param piece The chess piece.
         @return A QPixmap of the piece.
         """
-        piece_svg = chess.svg.piece(piece)
-        pixmap = QPixmap(100, 100)  # Fixed size for drag image
-        pixmap.loadFromData(piece_svg.encode(), 'SVG')
-        return pixmap.scaled(self.square_size, self.square_size, 
-                           Qt.KeepAspectRatio, 
-                           Qt.SmoothTransformation)
+        return piece_pixmap(piece.symbol(), self.square_size)
 
     def rebuild_board_state(self):
         """Rebuild the board state and prepare for analysis"""
         self.best_moves = []
         self.selected_square = None
         self.legal_moves = []
-        self.highlight_moves = []
+        self.set_highlight_moves([])
         self.update_board()
 
     def set_turn(self, color):
@@ -370,7 +652,7 @@ class BoardEditor(QMainWindow):
     def __init__(self, engine : chess.engine = None, fen=None, threads=4, multipv=3, mem=128, time=0.1, depth=50):
         """
         @brief Initialize the board editor window.
-        @param engine The chess engine instance.
+        @param engine The running engine to share, or an executable path for a standalone editor.
         @param fen Initial board FEN, if any.
         @param threads Number of threads.
         @param multipv Number of analysis lines.
@@ -380,18 +662,20 @@ class BoardEditor(QMainWindow):
         """
         super().__init__()
         self.setWindowTitle("Chess Board Editor")
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         self.setFixedSize(600, 700)
 
         self.fen = fen
-        self.fen_input = QLineEdit()
-        self.fen_input.setPlaceholderText("Enter FEN")
 
-        # NEW: If engine is a string, launch it as a UCI engine.
-        self.engine_path = engine if isinstance(engine, str) else "./stockfish/stockfish.exe"
+        # NEW: If engine is a string (standalone editor), the pool launches it on the first analysis request.
+        self.engine_path = engine if isinstance(engine, str) else None
         if isinstance(engine, str):
-            engine = chess.engine.SimpleEngine.popen_uci(engine)
-        self.board_widget = ChessBoard(engine=engine, threads=threads, multipv=multipv, mem=mem, time=time, depth=depth, parent=self)
+            self.engine_pool = EnginePool(engine, size=1, options={"Threads": threads, "Hash": mem})
+        else:
+            # Share the main window's running engine instead of starting a second process;
+            # its lifetime stays with the main window, so the pool never restarts or quits it.
+            self.engine_pool = EnginePool(engines=[engine] if engine else [])
+        self.board_widget = ChessBoard(engine=self.engine_pool, threads=threads, multipv=multipv, mem=mem, time=time, depth=depth, parent=self)
 
         self.status_label = QLabel("Edit Mode: OFF")
         self.status_label.setAlignment(Qt.AlignCenter)
@@ -471,6 +755,7 @@ class BoardEditor(QMainWindow):
         @brief Clear the entire board.
         """
         self.board_widget.board.clear()
+        self.board_widget.move_stack.clear()
         self.board_widget.best_moves = []
         self.board_widget.update_board()
 
@@ -481,16 +766,39 @@ class BoardEditor(QMainWindow):
         fen = self.fen_input.text()
         self.board_widget.set_fen(fen)
 
+    def closeEvent(self, event):
+        """
+        @brief Stop the editor's engine pool when the window closes.
+        @param event The close event.
+        """
+        self.board_widget.cancel_analysis()
+        self.engine_pool.quit()
+        super().closeEvent(event)
+
     def update_fen(self, fen):
         """Update FEN string in the input box"""
         self.fen_input.setText(fen)
 
+    def set_engine(self, engine):
+        """
+        @brief Switch the editor to the main window's replacement engine.
+
+        The pool adopted the previous engine, which the main window has quit; a
+        standalone editor starts its own engine and is left alone.
+        @param engine The new chess.engine.SimpleEngine, or None.
+        """
+        if self.engine_path is not None:
+            return
+        self.board_widget.cancel_analysis()
+        self.engine_pool.quit()
+        self.engine_pool = EnginePool(engines=[engine] if engine else [])
+        self.board_widget.engine = self.engine_pool
+        self.board_widget.analysis_cache.clear()  # Found by the old engine
+
     def refresh_board(self):
         """Refresh the board state and prepare for new operations"""
         # self.board_widget.rebuild_board_state()
-        self.board_widget.board.set_fen(self.board_widget.board.fen())
-        self.board_widget.update()
-        self.board_widget.update_board()
+        self.board_widget.update_board(force=True)
         self.update_fen(self.board_widget.board.fen())
         self.status_label.setText("Board Refreshed")
 
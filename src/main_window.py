@@ -1,18 +1,85 @@
-import platform
 import chess
 import chess.pgn
 import chess.engine
-import chess.svg
 import json
-import subprocess
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import datetime
-from PySide6.QtWidgets import *
+import io
+import os
+from PySide6.QtWidgets import (
+    QApplication, QDialog, QFileDialog, QLabel, QMainWindow, QMessageBox, QPlainTextEdit,
+    QPushButton, QSplitter, QTabWidget, QVBoxLayout, QWidget,
+)
 from PySide6.QtCore import QSettings, Qt
-from PySide6.QtGui import QAction, QIcon, QKeySequence
+from PySide6.QtGui import QAction, QKeySequence
 from interactive_board import BoardEditor
-from gametab import GameTab
-from dialogs import *
-from puzzleplayer import ChessPuzzleApp
+from gametab import GameTab, MainlineGameBuilder
+from dialogs import (
+    HelpDialog, OpeningSearchDialog, PGNSplitterDialog, PlayStockfishDialog, SettingsDialog,
+    app_icon, load_openings, openings_downloaded, warm_promotion_icons,
+)
+from engine_pool import popen_engine
+from engine_worker import call_locked, run_engine_task
+
+# Qt's own file dialog: the native one reloads shell extensions on every open on Windows
+FILE_DIALOG_OPTIONS = QFileDialog.DontUseNativeDialog
+
+def write_text_file(path, text):
+    """
+    @brief Write a text file; run through run_engine_task to keep the GUI thread free.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+def write_json_file(path, data, pretty=False):
+    """
+    @brief Serialize data to a JSON file; run through run_engine_task to keep the GUI thread free.
+    @param pretty Indent the output for hand editing; compact output is about half the size.
+    """
+    with open(path, "wb", buffering=1 << 20) as f:
+        if orjson is not None:
+            f.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)))
+        elif pretty:
+            f.write(json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8"))
+        else:
+            f.write(json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    return path
+
+def read_json_file(path):
+    """
+    @brief Load a JSON file; run through run_engine_task to keep the GUI thread free.
+    """
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# Headers of an opening study; load_opening adds ECO and Opening to a copy
+OPENING_HEADERS = {
+    "Event": "Opening Study",
+    "Site": "Chess Analysis App",
+    "Date": "????.??.??",
+    "Round": "?",
+    "White": "?",
+    "Black": "?"
+}
+
+# PGN dates use dots, which read like a file extension in a tab title
+_DATE_TO_TITLE = str.maketrans(".", "_")
+
+def game_tab_title(hdrs):
+    """
+    @brief Build the White_Black_Date title of a game tab.
+    @param hdrs The game's headers; Date may be missing or a datetime.date.
+    @return The tab title.
+    """
+    date = str(hdrs.get("Date") or "").translate(_DATE_TO_TITLE)
+    return f"{hdrs.get('White', '?')}_{hdrs.get('Black', '?')}_{date}"
 
 class BoardMaster(QMainWindow):
     def __init__(self):
@@ -23,33 +90,42 @@ class BoardMaster(QMainWindow):
         super().__init__()
         self.setWindowTitle("BoardMaster")
         self.setGeometry(100, 100, 1700, 800)
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
 
         self.settings = QSettings("BoardMaster", "BoardMaster")
+        self._reload_cfg()
+        self._pgn_path = None  # PGN file opened with open_pgn_file
+        self._pgn_file = None  # Its handle, positioned after the last game read
+        # Dialogs built on first use and reused afterwards
+        self._settings_dialog = None
+        self._splitter_dialog = None
+        self._help_dialog = None
 
         self.engine = self.initialize_engine()
         if not self.engine:
             return
 
-        global OPENINGS_LOADED_FLAG
-        global OPENINGS_DB
-        if OPENINGS_LOADED_FLAG is False and self.settings.value("game/load_openings", True, bool):
-            # dialog = LoadingDialog()
-            # dialog.show()
-            QApplication.processEvents()
-            load_openings()
-            QApplication.processEvents()
-            # dialog.accept()
+        # load_openings returns at once if the database is already loaded
+        if self.settings.value("game/load_openings", True, bool):
+            if openings_downloaded():
+                # Parse the dataset on a worker so the window shows right away
+                run_engine_task(load_openings, on_failed=lambda e: print(f"Error loading openings: {e}"))
+            else:
+                # The download shows a progress dialog, which has to run here
+                QApplication.processEvents()
+                load_openings()
+                QApplication.processEvents()
             
         self.create_gui()
         self.create_menus()
+        warm_promotion_icons()
 
     def create_gui(self):
         """
         @brief Create the main layout and widgets of the GUI.
         """
-        # Create main layout
-        main_layout = QHBoxLayout()
+        # Tabs and PGN panel share the window through a splitter instead of a fixed-width panel
+        splitter = QSplitter(Qt.Horizontal)
         
         # Left side with tab widget
         self.tab_widget = QTabWidget(tabsClosable=True)
@@ -57,27 +133,27 @@ class BoardMaster(QMainWindow):
         self.new_tab = GameTab(self)
         self.lg_ctr = 0
         # self.tab_widget.addTab(self.new_tab, f"Live Game {self.lg_ctr}")
-        main_layout.addWidget(self.tab_widget)
+        splitter.addWidget(self.tab_widget)
 
         # Right side with PGN input
         right_panel = QWidget()
-        right_panel.setFixedWidth(300)  # Fixed width of 300px
+        right_panel.setMinimumWidth(200)
         right_layout = QVBoxLayout(right_panel)
         
         # PGN widgets
         right_layout.addWidget(QLabel("PGN Input:"))
-        self.pgn_text = QTextEdit()
+        self.pgn_text = QPlainTextEdit()  # PGN is plain text, no rich-text layout
         load_button = QPushButton("Load Game")
         load_button.clicked.connect(self.load_game)
         
         right_layout.addWidget(self.pgn_text)
         right_layout.addWidget(load_button)
-        main_layout.addWidget(right_panel)
+        splitter.addWidget(right_panel)
+        splitter.setCollapsible(1, False)
+        splitter.setStretchFactor(0, 1)  # Extra width goes to the board, as before
+        splitter.setSizes([1400, 300])
 
-        # Create central widget to hold the layout
-        central_widget = QWidget()
-        central_widget.setLayout(main_layout)
-        self.setCentralWidget(central_widget)
+        self.setCentralWidget(splitter)
 
     def create_menus(self):
         """
@@ -85,67 +161,37 @@ class BoardMaster(QMainWindow):
         """
         menubar = self.menuBar()
 
-        file_menu = menubar.addMenu("File")
-        open_pgn = QAction("Open PGN File", self)
-        open_pgn.setShortcut(QKeySequence("Ctrl+O"))
-        open_pgn.triggered.connect(self.open_pgn_file)
-        file_menu.addAction(open_pgn)
-        live_game_tab = QAction("Open Live Game", self)
-        live_game_tab.setShortcut(QKeySequence("Ctrl+L"))
-        live_game_tab.triggered.connect(self.start_live_game)
-        file_menu.addAction(live_game_tab)
-        save_analysis_action = QAction("Save Analysis", self)
-        save_analysis_action.setShortcut(QKeySequence("Ctrl+S"))
-        save_analysis_action.triggered.connect(lambda: self.export_pgn(analysis=True))
-        load_analysis_action = QAction("Load Analysis", self)
-        load_analysis_action.setShortcut(QKeySequence("Ctrl+Shift+O"))
-        load_analysis_action.triggered.connect(self.load_analysis)
-        file_menu.addAction(save_analysis_action)
-        file_menu.addAction(load_analysis_action)
-
-
-        tool_menu = menubar.addMenu("&Tools")
-        board_editor_action = QAction("Open Board Editor", self)
-        board_editor_action.setShortcut(QKeySequence("Ctrl+B"))
-        board_editor_action.triggered.connect(lambda: self.open_interactive_board(be_mode=True))
-        tool_menu.addAction(board_editor_action)
-
-        interactive_board_action = QAction("Play Current Position", self)
-        interactive_board_action.setShortcut(QKeySequence("Ctrl+P"))
-        interactive_board_action.triggered.connect(self.open_interactive_board)
-        tool_menu.addAction(interactive_board_action)
-        # Play Puzzles
-        puzzle_action = QAction("Play Puzzles", self)
-        puzzle_action.setShortcut(QKeySequence("Ctrl+G"))
-        puzzle_action.triggered.connect(self.open_interactive_puzzle_board)
-        tool_menu.addAction(puzzle_action)
-        # Add PGN Splitter action
-        split_pgn_action = QAction("PGN Splitter", self)
-        split_pgn_action.setShortcut(QKeySequence("Ctrl+Shift+S"))
-        split_pgn_action.triggered.connect(self.show_pgn_splitter)
-        tool_menu.addAction(split_pgn_action)
-        # Add PGN Export action
-        export_pgn_action = QAction("Export PGN", self)
-        export_pgn_action.setShortcut(QKeySequence("Ctrl+Shift+E"))
-        export_pgn_action.triggered.connect(lambda: self.export_pgn(analysis=False))
-        tool_menu.addAction(export_pgn_action)
-
-        load_opening_action = QAction("Load Opening", self)
-        load_opening_action.setShortcut(QKeySequence("Ctrl+Shift+S"))
-        load_opening_action.triggered.connect(self.show_opening_dialog)
-        tool_menu.addAction(load_opening_action)
-
-        settings_menu = menubar.addMenu("&Settings")
-        open_settings = QAction("Engine Settings", self)
-        open_settings.setShortcut(QKeySequence("Ctrl+Shift+P"))
-        open_settings.triggered.connect(self.open_settings)
-        settings_menu.addAction(open_settings)
-
-        help_menu = menubar.addMenu("&Help")
-        open_help = QAction("How To Use", self)
-        open_help.setShortcut(QKeySequence("F1"))
-        open_help.triggered.connect(self.open_help)
-        help_menu.addAction(open_help)
+        # (menu title, [(action text, shortcut, handler), ...]), in menu bar order
+        menu_spec = [
+            ("File", [
+                ("Open PGN File", "Ctrl+O", self.open_pgn_file),
+                ("Open Next Game in PGN File", "Ctrl+Shift+N", self.load_next_pgn_game),
+                ("Open Live Game", "Ctrl+L", self.start_live_game),
+                ("Save Analysis", "Ctrl+S", lambda: self.export_pgn(analysis=True)),
+                ("Load Analysis", "Ctrl+Shift+O", self.load_analysis),
+            ]),
+            ("&Tools", [
+                ("Open Board Editor", "Ctrl+B", lambda: self.open_interactive_board(be_mode=True)),
+                ("Play Current Position", "Ctrl+P", self.open_interactive_board),
+                ("Play Puzzles", "Ctrl+G", self.open_interactive_puzzle_board),
+                ("PGN Splitter", "Ctrl+Shift+S", self.show_pgn_splitter),
+                ("Export PGN", "Ctrl+Shift+E", lambda: self.export_pgn(analysis=False)),
+                ("Load Opening", "Ctrl+Shift+S", self.show_opening_dialog),
+            ]),
+            ("&Settings", [
+                ("Engine Settings", "Ctrl+Shift+P", self.open_settings),
+            ]),
+            ("&Help", [
+                ("How To Use", "F1", self.open_help),
+            ]),
+        ]
+        for title, actions in menu_spec:
+            menu = menubar.addMenu(title)
+            for text, shortcut, handler in actions:
+                action = QAction(text, self)
+                action.setShortcut(QKeySequence(shortcut))
+                action.triggered.connect(handler)
+                menu.addAction(action)
 
         play_menu = self.menuBar().addMenu("Play")
         play_stockfish_action = play_menu.addAction("Play vs Stockfish")
@@ -171,21 +217,98 @@ class BoardMaster(QMainWindow):
                 else:
                     return None
                     
-            if platform.system() == "Windows":
-                transport = chess.engine.SimpleEngine.popen_uci(engine_path, creationflags=subprocess.CREATE_NO_WINDOW)
-            else:
-                transport = chess.engine.SimpleEngine.popen_uci(engine_path)
+            transport = popen_engine(engine_path)
             # Configure engine settings
-            transport.configure({
-                "Threads": self.settings.value("engine/threads", 4, int),
-                "Hash": self.settings.value("engine/memory", 16, int)
-            })
+            self.engine_options = {
+                "Threads": self._cfg["threads"],
+                "Hash": self._cfg["memory"]
+            }
+            transport.configure(self.engine_options)
+            self.engine_path = engine_path
             return transport
         except Exception as e:
             QMessageBox.critical(self, "Engine Error", 
                             f"Failed to initialize engine: {str(e)}")
             return None
 
+    def _reload_cfg(self):
+        """
+        @brief Read the engine and analysis settings once into self._cfg.
+
+        Called at startup and after the settings dialog saves, so hot actions never go
+        through the QSettings backend. Defaults match SettingsDialog.
+        """
+        self._cfg = {
+            "threads": self.settings.value("engine/threads", 4, int),
+            "memory": self.settings.value("engine/memory", 16, int),
+            "depth": self.settings.value("engine/depth", 20, int),
+            "multipv": self.settings.value("engine/lines", 3, int),
+            "postime": self.settings.value("analysis/postime", 0.1, float),
+        }
+        # BoardEditor's engine keyword arguments, rebuilt with _cfg
+        self._board_editor_kwargs = {
+            "threads": self._cfg["threads"],
+            "multipv": self._cfg["multipv"],
+            "mem": self._cfg["memory"],
+            "time": self._cfg["postime"],
+            "depth": self._cfg["depth"],
+        }
+
+    def apply_engine_settings(self):
+        """
+        @brief Apply saved engine settings to the running engine.
+
+        The process is only restarted when the engine path changed; otherwise just the
+        changed options are sent, so open tabs keep their engine and its hash table.
+        """
+        self._reload_cfg()
+        if not hasattr(self, "engine"):
+            return  # Still inside initialize_engine, which starts the engine itself
+        for index in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(index)
+            if isinstance(tab, GameTab):
+                tab.reload_settings()
+        engine_path = self.settings.value("engine/path", "", str)
+        if self.engine is None or engine_path != getattr(self, "engine_path", None):
+            if self.engine is not None:
+                # Wait for any running search to release the engine before shutting it down
+                old_engine = self.engine
+                run_engine_task(
+                    call_locked, old_engine, old_engine.quit,
+                    on_failed=lambda e: print(f"Error stopping engine: {e}")
+                )
+            self.engine = self.initialize_engine()
+            # Open tabs keep a reference to the engine they were created with
+            for index in range(self.tab_widget.count()):
+                tab = self.tab_widget.widget(index)
+                if isinstance(tab, GameTab):
+                    tab.engine = self.engine
+            if self.new_tab is not None:
+                self.new_tab.engine = self.engine
+            # Open board editors share the engine through their own pools
+            for widget in QApplication.topLevelWidgets():
+                if isinstance(widget, BoardEditor):
+                    widget.set_engine(self.engine)
+            return
+        options = {
+            "Threads": self._cfg["threads"],
+            "Hash": self._cfg["memory"]
+        }
+        changed = {name: value for name, value in options.items() if self.engine_options.get(name) != value}
+        if changed:
+            run_engine_task(
+                call_locked, self.engine, self.engine.configure, changed,
+                on_failed=self.engine_settings_failed
+            )
+            self.engine_options.update(changed)
+
+    def engine_settings_failed(self, error):
+        """
+        @brief Report engine options the running engine rejected.
+        @param error The exception raised by configure.
+        """
+        QMessageBox.critical(self, "Engine Error", f"Failed to apply engine settings:\n{error}")
+
     def keyPressEvent(self, event):
         """
         @brief Handle key press events.
@@ -201,25 +324,26 @@ class BoardMaster(QMainWindow):
         """
         @brief Open the engine settings dialog.
         """
-        dialog = SettingsDialog(self)
-        dialog.exec()
+        if self._settings_dialog is None:
+            self._settings_dialog = SettingsDialog(self)
+        self._settings_dialog.reset()
+        self._settings_dialog.exec()
     
     def show_pgn_splitter(self):
         """
         @brief Open the PGN splitter dialog.
         """
-        splitter = PGNSplitterDialog(self)
-        splitter.exec()
+        if self._splitter_dialog is None:
+            self._splitter_dialog = PGNSplitterDialog(self)
+        self._splitter_dialog.reset()
+        self._splitter_dialog.exec()
 
     def show_opening_dialog(self):
         """Show the opening search dialog."""
-        new_tab = GameTab(self)
-        dialog = OpeningSearchDialog(game_tab=new_tab)
-        # opening = dialog.load_selected_opening()
+        # No GameTab until an opening is picked: load_opening builds the one it shows
+        dialog = OpeningSearchDialog(self)
         if dialog.exec_() == QDialog.Accepted:
             self.load_opening(dialog.selected_opening)
-            # Opening was loaded in the dialog's load_selected_opening method
-            pass
     
     def load_opening(self, opening_data):
         """
@@ -233,14 +357,7 @@ class BoardMaster(QMainWindow):
         # self.reset_game()
         
         # Set up custom headers.
-        self.hdrs = {
-            "Event": "Opening Study",
-            "Site": "Chess Analysis App",
-            "Date": "????.??.??",
-            "Round": "?",
-            "White": "?",
-            "Black": "?"
-        }
+        self.hdrs = dict(OPENING_HEADERS)
         if "eco" in opening_data:
             self.hdrs["ECO"] = opening_data["eco"]
         if "name" in opening_data:
@@ -252,31 +369,23 @@ class BoardMaster(QMainWindow):
             print("No PGN data provided in the opening.")
             return
         
-        # Create a new PGN game and add headers.
-        game = chess.pgn.Game()
-        for key, value in self.hdrs.items():
-            game.headers[key] = value
-
-        # Parse the moves from the provided PGN text.
+        # Parse the moves from the provided PGN text, once.
         pgn_io = io.StringIO(pgn_text)
-        parsed_game = chess.pgn.read_game(pgn_io)
-        if parsed_game is None:
+        game = chess.pgn.read_game(pgn_io)
+        if game is None:
             print("Failed to parse PGN moves from provided text.")
             return
 
-        # Add the moves from the parsed game into our new game.
-        node = game
-        for move in parsed_game.mainline_moves():
-            node = node.add_main_variation(move)
-
-        # Convert the game to a full PGN string.
+        # Put our headers on the parsed game and load it directly, without a second parse.
+        for key, value in self.hdrs.items():
+            game.headers[key] = value
         full_pgn = str(game)
         print("Constructed PGN:\n", full_pgn)
 
-        # Now load the PGN using your load_pgn method.
-        
-        self.pgn_text.setText(full_pgn)
-        self.load_game(self.hdrs["Opening"])
+        self.pgn_text.setPlainText(full_pgn)
+        self.new_tab = GameTab(self)
+        if self.new_tab.load_game(game):
+            self.add_game_tab(self.hdrs.get("Opening"))
 
         # Update the window title if applicable.
         # if hasattr(self, 'parent') and hasattr(self.parent(), 'setWindowTitle'):
@@ -290,11 +399,10 @@ class BoardMaster(QMainWindow):
 
         if analysis is False:
             file_name, _ = QFileDialog.getSaveFileName(
-                self, "Save PGN File", fname, filter="*.pgn"
+                self, "Save PGN File", fname, filter="*.pgn", options=FILE_DIALOG_OPTIONS
             )
             if file_name:
-                with open(file_name, "w") as f:
-                    f.write(pgn_str)
+                run_engine_task(write_text_file, file_name, pgn_str, on_failed=self.file_io_failed)
 
         if analysis is True:
             opening = self.new_tab.opening_label.text()
@@ -311,61 +419,114 @@ class BoardMaster(QMainWindow):
             }
 
             file_name, _ = QFileDialog.getSaveFileName(
-                self, "Save JSON File", fname.replace(".pgn", ".json"), "JSON files (*.json)"
+                self, "Save JSON File", fname.replace(".pgn", ".json"), "JSON files (*.json)",
+                options=FILE_DIALOG_OPTIONS,
             )
             if file_name:
-                with open(file_name, "w", encoding="utf-8") as f:
-                    json.dump(analysis_data, f, indent=2)
+                # analysis_data was built from the tab above; only the serialization runs off-thread
+                run_engine_task(
+                    write_json_file, file_name, analysis_data,
+                    pretty=self.settings.value("analysis/pretty_json", False, bool),
+                    on_finished=lambda path: QMessageBox.information(self, "Analysis Saved", f"Analysis saved to:\n{path}"),
+                    on_failed=self.file_io_failed,
+                )
 
-                QMessageBox.information(self, "Analysis Saved", f"Analysis saved to:\n{file_name}")
+    def file_io_failed(self, error):
+        """
+        @brief Report a failed background file read or write.
+        @param error The exception raised by the worker.
+        """
+        print(f"File error: {error}")
+        QMessageBox.critical(self, "File Error", str(error))
     
     def load_analysis(self):
         """
         Load the analysis from a file and restore game state.
         """
-        file_path, _ = QFileDialog.getOpenFileName(self, "Load Analysis", self.settings.value("game_analysis_dir", "", str), "Analysis Files (*.json)")
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Load Analysis", self.settings.value("game_analysis_dir", "", str), "Analysis Files (*.json)",
+            options=FILE_DIALOG_OPTIONS,
+        )
         if file_path:
-            with open(file_path, "r", encoding="utf-8") as f:
-                analysis_data = json.load(f)
-            
+            run_engine_task(
+                read_json_file, file_path,
+                on_finished=lambda analysis_data: self.restore_analysis(file_path, analysis_data),
+                on_failed=self.file_io_failed,
+            )
+
+    def restore_analysis(self, file_path, analysis_data):
+        """
+        @brief Open a tab for analysis data loaded by load_analysis.
+        @param file_path The analysis file, used for the tab title.
+        @param analysis_data The decoded JSON dict.
+        """
+        # The tab is filled in while visible; hold its repaints until everything is restored
+        self.tab_widget.setUpdatesEnabled(False)
+        try:
             self.new_tab = GameTab(self)
             curr_tab_index = self.tab_widget.addTab(self.new_tab, f"{os.path.basename(file_path)}")
             self.tab_widget.setCurrentIndex(curr_tab_index)
-            
+        
             pgn_string = analysis_data.get("pgn", "")
-            if not self.new_tab.load_pgn(pgn_string, is_analysis=True):
-                QMessageBox.critical(self, "Load Failed", "Failed to load the game from the analysis file.")
-                return
-
-            self.new_tab.move_evaluations = analysis_data.get("move_evaluations", [])
-            self.new_tab.move_evaluations_scores = analysis_data.get("move_evaluations_scores", [])
-            self.new_tab.white_accuracy = analysis_data.get("white_accuracy", 0)
-            self.new_tab.black_accuracy = analysis_data.get("black_accuracy", 0)
-            self.new_tab.move_notes = analysis_data.get("move_notes", {})
-            self.new_tab.opening_label.setText(f"Opening: {analysis_data.get('opening_name', {})} {analysis_data.get('opening_eco', {})}")
-            self.new_tab.has_been_analyzed = True
-            self.new_tab.update_display()
-            self.new_tab.update_game_summary()
-            QMessageBox.information(self, "Analysis Loaded", "Analysis loaded successfully.")
+            loaded = self.new_tab.load_pgn(pgn_string, is_analysis=True)
+            if loaded:
+                self.new_tab.move_evaluations = analysis_data.get("move_evaluations", [])
+                self.new_tab.move_evaluations_scores = analysis_data.get("move_evaluations_scores", [])
+                self.new_tab.white_accuracy = analysis_data.get("white_accuracy", 0)
+                self.new_tab.black_accuracy = analysis_data.get("black_accuracy", 0)
+                self.new_tab.move_notes = analysis_data.get("move_notes", {})
+                self.new_tab.opening_label.setText(f"Opening: {analysis_data.get('opening_name', {})} {analysis_data.get('opening_eco', {})}")
+                self.new_tab.has_been_analyzed = True
+                self.new_tab.update_display()
+                self.new_tab.update_game_summary()
+        finally:
+            self.tab_widget.setUpdatesEnabled(True)
+        if not loaded:
+            QMessageBox.critical(self, "Load Failed", "Failed to load the game from the analysis file.")
+            return
+        QMessageBox.information(self, "Analysis Loaded", "Analysis loaded successfully.")
 
     def open_help(self):
         """
         @brief Open the help dialog.
         """
-        help_dialog = HelpDialog(self)
-        help_dialog.exec()
+        if self._help_dialog is None:
+            self._help_dialog = HelpDialog(self)
+        self._help_dialog.exec()
 
     def open_pgn_file(self):
         """
         @brief Open a PGN file and load its content.
         """
         file_name, _ = QFileDialog.getOpenFileName(
-            self, "Open PGN File", self.settings.value("game_dir", "", str), "PGN files (*.pgn)"
+            self, "Open PGN File", self.settings.value("game_dir", "", str), "PGN files (*.pgn)",
+            options=FILE_DIALOG_OPTIONS,
         )
         if file_name:
-            with open(file_name, "r") as f:
-                self.pgn_text.setText(f.read())
-            self.load_game()
+            if self._pgn_file is not None:
+                self._pgn_file.close()
+            # Games are parsed straight from the file, one at a time, instead of
+            # copying the whole file through the text box
+            self._pgn_path = file_name
+            self._pgn_file = open(file_name, "r")
+            self.load_next_pgn_game()
+
+    def load_next_pgn_game(self):
+        """
+        @brief Read the next game of the open PGN file into a new tab.
+        """
+        if self._pgn_file is None:
+            return
+        game = chess.pgn.read_game(self._pgn_file, Visitor=MainlineGameBuilder)  # Side variations are not loaded, so skip parsing them
+        if game is None:
+            self._pgn_file.close()
+            self._pgn_file = None
+            QMessageBox.information(self, "End of File", f"No more games in {os.path.basename(self._pgn_path)}.")
+            return
+        self.pgn_text.setPlainText(str(game))  # Only the current game is shown
+        self.new_tab = GameTab(self)
+        if self.new_tab.load_game(game):
+            self.add_game_tab()
     
     def start_live_game(self):
         self.lg_ctr += 1
@@ -392,20 +553,14 @@ class BoardMaster(QMainWindow):
             fen=self.new_tab.current_board.fen()
         else:
             fen = None
-        self.interactive_board = BoardEditor(engine=self.engine,
-                                             fen=fen,
-                                             threads=self.settings.value("engine/threads", 4, int),
-                                             multipv=self.settings.value("engine/lines", 3, int),
-                                             mem=self.settings.value("engine/memory", 16, int),
-                                             time=self.settings.value("analysis/postime", 3, int),
-                                             depth=self.settings.value("engine/depth", 40, int)
-                                             )
+        self.interactive_board = BoardEditor(engine=self.engine, fen=fen, **self._board_editor_kwargs)
         self.interactive_board.show()
 
     def open_interactive_puzzle_board(self):
         """
         @brief Open the interactive board for puzzles.
         """
+        from puzzleplayer import ChessPuzzleApp  # Most sessions never open puzzles
         self.interactive_board = ChessPuzzleApp()
         self.interactive_board.show()
 
@@ -415,20 +570,23 @@ class BoardMaster(QMainWindow):
         """
         pgn_string = self.pgn_text.toPlainText()
         self.new_tab = GameTab(self)
-        if opening is None and self.new_tab.load_pgn(pgn_string):
-            self.tab_widget.addTab(self.new_tab, f"{self.new_tab.hdrs.get('White')}_{self.new_tab.hdrs.get('Black')}_{self.new_tab.hdrs.get('Date').replace('.', '_')}")
-            self.tab_widget.setCurrentWidget(self.new_tab)
-        elif opening is not None and self.new_tab.load_pgn(pgn_string):
-            self.tab_widget.addTab(self.new_tab, f"{opening}_Review")
-            self.tab_widget.setCurrentWidget(self.new_tab)
+        if self.new_tab.load_pgn(pgn_string):
+            self.add_game_tab(opening)
 
-    def analyze_position(self, board):
+    def add_game_tab(self, opening=None):
         """
-        @brief Analyze a given board position.
-        @param board The chess board to analyze.
+        @brief Show self.new_tab, which holds a freshly loaded game, as the current tab.
+        @param opening Opening name for review tabs, or None to title the tab by players and date.
         """
-        depth = self.settings.value("engine/depth", 20, int)
-        self.engine.analyse(board, chess.engine.Limit(depth=depth))
+        if opening is None:
+            title = game_tab_title(self.new_tab.hdrs)
+        else:
+            title = f"{opening}_Review"
+        # Add and switch in one repaint
+        self.tab_widget.setUpdatesEnabled(False)
+        self.tab_widget.addTab(self.new_tab, title)
+        self.tab_widget.setCurrentWidget(self.new_tab)
+        self.tab_widget.setUpdatesEnabled(True)
 
     def closeEvent(self, event):
         """
@@ -436,8 +594,10 @@ class BoardMaster(QMainWindow):
         @param event The close event.
         """
         if hasattr(self, "engine") and self.engine:
-            self.engine.quit()
+            call_locked(self.engine, self.engine.quit)
             print("Engine stopped.")
+        if self._pgn_file is not None:
+            self._pgn_file.close()
         super().closeEvent(event)
 
     def play_vs_stockfish(self):
@@ -1,26 +1,37 @@
 from gettext import install
 import sys
+import bisect
 import random
 import os
 import csv
-import io
 from pathlib import Path
 import requests
 
 import chess
 import chess.svg
-from PySide6.QtCore import Qt, QSize, Signal, Slot, QTimer, QMimeData, QPoint
-from PySide6.QtGui import QPixmap, QIcon, QDrag, QCursor
+from PySide6.QtCore import Qt, QSize, Signal, Slot, QTimer, QPoint
+from PySide6.QtGui import QDrag, QCursor
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                               QHBoxLayout, QLabel, QPushButton, QComboBox, 
                               QFileDialog, QMessageBox, QSplitter, QFrame)
 from PySide6.QtSvgWidgets import QSvgWidget
 import polars as pl
 
-from dialogs import start_hf_download
+from dialogs import app_icon, start_hf_download, DATASETS_DIR
+from board_svg import render_board_svg, piece_pixmap, square_mime_data, dropped_square, SQUARE_MIME_TYPE
+from engine_worker import run_engine_task
 
 PUZZLES_LOADED_FLAG = False
-PUZZLES_DB = None
+PUZZLES_DB = None  # polars LazyFrame over the puzzle parquet file
+# Columns read from the puzzle dataset
+PUZZLE_COLUMNS = ["PuzzleId", "FEN", "Moves", "Rating", "Themes"]
+
+# Last rank of each side, where its pawns promote
+PROMOTION_RANKS = {chess.WHITE: chess.BB_RANK_8, chess.BLACK: chess.BB_RANK_1}
+
+def parse_puzzle_moves(uci_moves):
+    """Parse a puzzle's UCI move strings once, when the puzzles are loaded."""
+    return [chess.Move.from_uci(uci) for uci in uci_moves]
 
 class ChessBoard(QSvgWidget):
     """Chess board widget using SVG rendering."""
@@ -37,33 +48,63 @@ class ChessBoard(QSvgWidget):
         self.setMinimumSize(400, 400)
         self.setAcceptDrops(True)  # Enable drop events
         self.drag_start_position = None
-        self.update_board()
-        
+        self._legal_targets = {}  # from square -> legal destination squares
+        self._legal_targets_key = None  # Position the targets were generated for
+        self._last_render_key = None  # Arguments of the SVG currently loaded
+        self._square_size = self.width() // 8  # Drag image size, updated on resize
+        # Coalesces update_board calls (e.g. one per resize step) into one render per event loop pass
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self.render_board)
+        self.render_board()
+        
+    def legal_targets(self, square):
+        """
+        @brief Get the destinations of the legal moves from a square.
+
+        The moves are generated once per position, so reselecting pieces and
+        redrawing during a drag look them up instead of rescanning legal_moves.
+        @param square Origin square.
+        @return List of destination squares (empty if none).
+        """
+        board = self.board
+        key = (board.board_fen(), board.turn, board.castling_rights, board.ep_square)
+        if key != self._legal_targets_key:
+            self._legal_targets_key = key
+            self._legal_targets = {}
+            for move in board.legal_moves:
+                self._legal_targets.setdefault(move.from_square, []).append(move.to_square)
+        return self._legal_targets.get(square, [])
+
     def update_board(self):
+        """Schedule a render of the board; calls before it runs are merged into one."""
+        if not self._render_timer.isActive():
+            self._render_timer.start()
+
+    def render_board(self):
         """Update the board display with current position and highlights."""
-        lastmove = self.last_move
         check = self.board.king(self.board.turn) if self.board.is_check() else None
         
-        # Highlight squares
-        squares = {}
+        # Mark the selected square and its legal destinations
+        squares = ()
         if self.selected_square is not None:
-            squares[self.selected_square] = "#aaff00"  # highlight selected square
-            
-            # Highlight legal moves from selected square
-            for move in self.board.legal_moves:
-                if move.from_square == self.selected_square:
-                    squares[move.to_square] = "#aaaaff"
-        
-        # Generate SVG and load it, with board orientation set to player_color.
-        svg_data = chess.svg.board(
-            board=self.board,
-            lastmove=lastmove,
-            check=check,
-            squares=squares,
-            size=self.width(),
-            orientation=self.player_color  # flips board if player is black
-        )
-        self.load(bytearray(svg_data, encoding='utf-8'))
+            squares = (self.selected_square,) + tuple(self.legal_targets(self.selected_square))
+        
+        # Board orientation follows player_color (flipped if the player is black)
+        key = (self.board.board_fen(), self.player_color, check, self.last_move, self.width(), squares)
+        if key == self._last_render_key:
+            return  # Same image: skip QSvgWidget re-parsing the SVG
+        self._last_render_key = key
+        # Reselecting or resizing back to a seen state hits the SVG cache
+        self.load(render_board_svg(
+            key[0],
+            self.player_color,
+            check,
+            lastmove=self.last_move,
+            size=key[4],
+            squares_key=squares
+        ))
         
     def square_at_position(self, pos):
         """Convert screen coordinates to chess square taking board orientation into account."""
@@ -80,12 +121,6 @@ class ChessBoard(QSvgWidget):
             return chess.square(file_idx, rank_idx)
         return None
         
-    def get_piece_svg(self, piece, square):
-        """Generate SVG for a single piece."""
-        size = self.width() // 8  # size of one square
-        piece_svg = chess.svg.piece(piece, size=size)
-        return piece_svg
-
     def mousePressEvent(self, event):
         """Handle mouse press events for drag and click functionality."""
         if event.button() == Qt.LeftButton:
@@ -126,15 +161,10 @@ class ChessBoard(QSvgWidget):
             
         # Start drag operation
         drag = QDrag(self)
-        mime_data = QMimeData()
-        mime_data.setText(str(from_square))
-        drag.setMimeData(mime_data)
+        drag.setMimeData(square_mime_data(from_square))
 
-        # Create piece image for dragging
-        piece_svg = self.get_piece_svg(piece, from_square)
-        pixmap = QPixmap(100, 100)  # Fixed size for drag image
-        pixmap.fill(Qt.transparent)
-        pixmap.loadFromData(piece_svg.encode(), 'SVG')
+        # Create piece image for dragging, one square wide; rasterized once per piece and size
+        pixmap = piece_pixmap(piece.symbol(), self._square_size)
         
         # Set the drag pixmap with the piece image
         drag.setPixmap(pixmap)
@@ -168,20 +198,19 @@ class ChessBoard(QSvgWidget):
             
     def dragEnterEvent(self, event):
         """Handle drag enter events."""
-        if event.mimeData().hasText():
+        if event.mimeData().hasFormat(SQUARE_MIME_TYPE):
             event.acceptProposedAction()
     
     def dragMoveEvent(self, event):
         """Handle drag move events."""
-        if event.mimeData().hasText():
+        if event.mimeData().hasFormat(SQUARE_MIME_TYPE):
             event.acceptProposedAction()
     
     def dropEvent(self, event):
         """Handle drop events to complete a move."""
-        if event.mimeData().hasText():
-            # Get the source square from mime data
-            from_square = int(event.mimeData().text())
-            
+        # Get the source square from mime data
+        from_square = dropped_square(event.mimeData())
+        if from_square is not None:
             # Get the destination square from drop position
             to_square = self.square_at_position(event.position())
             
@@ -196,15 +225,14 @@ class ChessBoard(QSvgWidget):
         # Create the move
         move = chess.Move(from_square, to_square)
         
-        # Check if promotion
-        if (self.board.piece_at(from_square).piece_type == chess.PAWN and 
-            ((to_square >= 56 and self.board.turn == chess.WHITE) or 
-             (to_square <= 7 and self.board.turn == chess.BLACK))):
+        # Check if promotion: a pawn reaching the side to move's last rank
+        if (self.board.piece_type_at(from_square) == chess.PAWN and
+                chess.BB_SQUARES[to_square] & PROMOTION_RANKS[self.board.turn]):
             # Automatically promote to queen for simplicity
             move = chess.Move(from_square, to_square, promotion=chess.QUEEN)
         
         # Check if the move is legal
-        if move in self.board.legal_moves:
+        if self.board.is_legal(move):
             # Emit the move signal
             self.move_made.emit(move)
         
@@ -215,6 +243,7 @@ class ChessBoard(QSvgWidget):
     def resizeEvent(self, event):
         """Update the board when resized."""
         super().resizeEvent(event)
+        self._square_size = self.width() // 8
         self.update_board()
         
     def reset_board(self):
@@ -255,18 +284,14 @@ class PuzzleManager:
             return PUZZLES_DB
 
         try:
-            QApplication.processEvents()
             # df = pl.scan_parquet("hf://datasets/Lichess/chess-puzzles/data/train-00000-of-00002.parquet")
-            abs_pth = os.path.abspath(sys.argv[0])
-            install_dir = os.path.dirname(abs_pth)
-            data_dir = os.path.join(install_dir, "datasets")
+            data_dir = DATASETS_DIR
             if not os.path.exists(data_dir):
                 os.makedirs(data_dir)
             if not os.path.exists(os.path.join(data_dir, "data", "train-00000-of-00001.parquet")):
                 start_hf_download(label_txt="Downloading Puzzle Dataset...", repo_id="Lichess/chess-puzzles", hf_filename="data/train-00000-of-00002.parquet", local_dir=data_dir)
-            df = pl.scan_parquet(os.path.join(data_dir, "data", "train-00000-of-00002.parquet"))
-            QApplication.processEvents()
-            df = df.collect()
+            # Kept lazy: each rating query reads only the columns and rows it needs
+            df = pl.scan_parquet(os.path.join(data_dir, "data", "train-00000-of-00002.parquet")).select(PUZZLE_COLUMNS)
             self.dataframe = df
             PUZZLES_DB = df
             PUZZLES_LOADED_FLAG = True
@@ -290,28 +315,29 @@ class PuzzleManager:
             # Limit the number of puzzles if needed
             if limit > 0:
                 filtered_df = filtered_df.head(limit)
+            # The filter and limit run inside the parquet scan, so only matching rows are read
+            filtered_df = filtered_df.collect()
                 
             self.puzzles = []
             self.puzzles_by_rating = {}
             
-            # Convert dataframe rows to puzzle dictionaries
-            for row in filtered_df.iter_rows(named=True):
-                puzzle = {
-                    'id': row.get('PuzzleId', ''),
-                    'fen': row.get('FEN', ''),
-                    'moves': row.get('Moves', '').split(),
-                    'rating': row.get('Rating', 0),
-                    'themes': row.get('Themes', '').split()
-                }
-                
-                self.puzzles.append(puzzle)
-                
-                # Organize puzzles by rating range (in 100-point buckets)
-                rating_bucket = (puzzle['rating'] // 100) * 100
-                if rating_bucket not in self.puzzles_by_rating:
-                    self.puzzles_by_rating[rating_bucket] = []
-                self.puzzles_by_rating[rating_bucket].append(len(self.puzzles) - 1)
-            
+            # Split the move and theme lists in Polars, then build the puzzle
+            # dictionaries from whole columns instead of one named row at a time.
+            # extract_all(\S+) splits like str.split(): no empty items.
+            cols = filtered_df.select(
+                pl.col("PuzzleId"),
+                pl.col("FEN"),
+                pl.col("Moves").str.extract_all(r"\S+"),
+                pl.col("Rating"),
+                pl.col("Themes").str.extract_all(r"\S+")
+            ).sort("Rating").to_dict(as_series=False)
+            self.puzzles = [
+                {'id': pid, 'fen': fen, 'moves': parse_puzzle_moves(moves), 'rating': rating, 'themes': themes}
+                for pid, fen, moves, rating, themes in zip(
+                    cols["PuzzleId"], cols["FEN"], cols["Moves"], cols["Rating"], cols["Themes"]
+                )
+            ]
+            self.index_by_rating()
             return True
             
         except Exception as e:
@@ -324,96 +350,99 @@ class PuzzleManager:
             # URL for the Hugging Face Lichess puzzle dataset
             url = "https://huggingface.co/datasets/lichess/lichess-puzzles/resolve/main/lichess_db_puzzle.csv"
             
-            # Download a sample of puzzles (first 10,000 lines)
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            # Process the CSV data
-            content = io.StringIO(response.text)
-            reader = csv.reader(content)
-            
-            # Skip header row if present
-            header = next(reader, None)
-            
-            count = 0
-            self.puzzles = []
-            for row in reader:
-                if count >= limit:
-                    break
-                    
-                puzzle_id, fen, moves, rating, *_ = row
-                rating = int(rating)
+            # Stream only as much of the file as the limit needs; leaving the
+            # with block after the loop closes the connection
+            with requests.get(url, stream=True) as response:
+                response.raise_for_status()
+                response.encoding = "utf-8"
                 
-                if min_rating <= rating <= max_rating:
-                    self.puzzles.append({
-                        'id': puzzle_id,
-                        'fen': fen,
-                        'moves': moves.split(),
-                        'rating': rating
-                    })
-                    count += 1
-                    
-                    # Organize puzzles by rating range (in 100-point buckets)
-                    rating_bucket = (rating // 100) * 100
-                    if rating_bucket not in self.puzzles_by_rating:
-                        self.puzzles_by_rating[rating_bucket] = []
-                    self.puzzles_by_rating[rating_bucket].append(len(self.puzzles) - 1)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error loading puzzles: {e}")
-            return False
-    
-    def load_puzzles_from_file(self, file_path):
-        """Load puzzles from a local CSV file."""
-        try:
-            with open(file_path, 'r') as f:
-                reader = csv.reader(f)
-                # Skip header if exists
+                # Process the CSV data line by line
+                reader = csv.reader(response.iter_lines(decode_unicode=True))
+                
+                # Skip header row if present
                 header = next(reader, None)
                 
+                count = 0
                 self.puzzles = []
                 for row in reader:
+                    if count >= limit:
+                        break
+                        
                     puzzle_id, fen, moves, rating, *_ = row
                     rating = int(rating)
                     
-                    self.puzzles.append({
-                        'id': puzzle_id,
-                        'fen': fen,
-                        'moves': moves.split(),
-                        'rating': rating
-                    })
-                    
-                    # Organize puzzles by rating range (in 100-point buckets)
-                    rating_bucket = (rating // 100) * 100
-                    if rating_bucket not in self.puzzles_by_rating:
-                        self.puzzles_by_rating[rating_bucket] = []
-                    self.puzzles_by_rating[rating_bucket].append(len(self.puzzles) - 1)
-                
+                    if min_rating <= rating <= max_rating:
+                        self.puzzles.append({
+                            'id': puzzle_id,
+                            'fen': fen,
+                            'moves': parse_puzzle_moves(moves.split()),
+                            'rating': rating
+                        })
+                        count += 1
+            
+            self.index_by_rating()
             return True
             
+        except Exception as e:
+            print(f"Error loading puzzles: {e}")
+            return False
+    
+    def load_puzzles_from_file(self, file_path):
+        """
+        Load puzzles from a local CSV file.
+        The first four columns are the puzzle id, FEN, moves and rating, as in the Lichess
+        export; Polars parses the file and the rows go through process_puzzles_from_dataframe.
+        Every column is read as text so IDs keep leading zeros; only the rating is cast.
+        """
+        try:
+            df = pl.scan_csv(file_path, infer_schema=False)
+            names = df.collect_schema().names()
+            df = df.select(
+                pl.nth(0).alias("PuzzleId"),
+                pl.nth(1).alias("FEN"),
+                pl.nth(2).alias("Moves"),
+                pl.nth(3).cast(pl.Int64).alias("Rating"),
+                pl.col("Themes").fill_null("") if "Themes" in names else pl.lit("").alias("Themes")
+            )
         except Exception as e:
             print(f"Error loading puzzles from file: {e}")
             return False
+        # The file replaces the current dataset, with every rating and no limit
+        self.dataframe = df
+        return self.process_puzzles_from_dataframe(0, sys.maxsize, limit=0)
     
+    def index_by_rating(self):
+        """
+        Sort self.puzzles by rating and map each 100-point bucket to its range of indices.
+        With the puzzles sorted, the buckets of any rating span are one contiguous run.
+        """
+        self.puzzles.sort(key=lambda puzzle: puzzle['rating'])
+        ratings = [puzzle['rating'] for puzzle in self.puzzles]
+        self.puzzles_by_rating = {}
+        start = 0
+        while start < len(ratings):
+            bucket = (ratings[start] // 100) * 100
+            end = bisect.bisect_left(ratings, bucket + 100, start)
+            self.puzzles_by_rating[bucket] = range(start, end)
+            start = end
+
     def get_puzzle_by_rating(self, min_rating, max_rating):
         """Get a random puzzle within the specified rating range."""
-        eligible_puzzles = []
-        for rating in range((min_rating // 100) * 100, max_rating + 1, 100):
-            if rating in self.puzzles_by_rating:
-                eligible_puzzles.extend(self.puzzles_by_rating[rating])
+        spans = [self.puzzles_by_rating[rating]
+                 for rating in range((min_rating // 100) * 100, max_rating + 1, 100)
+                 if rating in self.puzzles_by_rating]
         
-        if not eligible_puzzles:
+        if not spans:
             return None
         
-        puzzle_idx = random.choice(eligible_puzzles)
+        # Buckets are adjacent in the sorted list, so every eligible puzzle lies in one range
+        puzzle_idx = random.randrange(spans[0].start, spans[-1].stop)
         self.current_puzzle = self.puzzles[puzzle_idx]
         self.current_move_index = 0
         return self.current_puzzle
     
     def get_next_correct_move(self):
-        """Get the next correct move in the current puzzle."""
+        """Get the next correct move in the current puzzle, as a chess.Move."""
         if not self.current_puzzle or self.current_move_index >= len(self.current_puzzle['moves']):
             return None
         
@@ -433,7 +462,7 @@ class ChessPuzzleApp(QMainWindow):
     def __init__(self):
         super().__init__()
 
-        self.setWindowIcon(QIcon("./img/king.ico"))
+        self.setWindowIcon(app_icon())
         
         self.chess_board = ChessBoard()
         self.puzzle_manager = PuzzleManager()
@@ -514,6 +543,8 @@ class ChessPuzzleApp(QMainWindow):
         right_layout.addWidget(load_file_button)
         right_layout.addWidget(next_puzzle_button)
         right_layout.addWidget(reset_button)
+        # Disabled while puzzles are processed on a worker thread
+        self.load_buttons = [load_hf_parquet_button, load_file_button, next_puzzle_button]
         
         # Status display
         self.status_label = QLabel("Ready to load puzzles")
@@ -540,8 +571,7 @@ class ChessPuzzleApp(QMainWindow):
     def handle_move_made(self, move):
         """Handle moves made on the board."""
         # Get the expected correct move (this will be the second move in the puzzle)
-        correct_move_uci = self.puzzle_manager.get_next_correct_move()
-        correct_move = chess.Move.from_uci(correct_move_uci) if correct_move_uci else None
+        correct_move = self.puzzle_manager.get_next_correct_move()
         
         # Check if the move is correct
         if correct_move and move == correct_move:
@@ -567,9 +597,8 @@ class ChessPuzzleApp(QMainWindow):
     def make_engine_move(self):
         """Make the engine's move in the puzzle."""
         if self.puzzle_manager.current_puzzle:
-            correct_move_uci = self.puzzle_manager.get_next_correct_move()
-            if correct_move_uci:
-                move = chess.Move.from_uci(correct_move_uci)
+            move = self.puzzle_manager.get_next_correct_move()
+            if move:
                 self.chess_board.board.push(move)
                 self.chess_board.last_move = move
                 self.chess_board.update_board()
@@ -609,17 +638,18 @@ class ChessPuzzleApp(QMainWindow):
     #         QMessageBox.warning(self, "Error", "Failed to load puzzles from Hugging Face. Check your internet connection.")
     
     def load_puzzles_from_hf_parquet(self):
-        """Load puzzles from Hugging Face dataset (Parquet)."""
-        self.status_label.setText("Loading puzzles from Hugging Face (Parquet)...")
-        QApplication.processEvents()
-        
+        """
+        Load puzzles from Hugging Face dataset (Parquet).
+        The rating query runs on a worker thread; puzzles_processed finishes on the GUI thread.
+        """
         # First check if puzzles are already loaded
         global PUZZLES_LOADED_FLAG
         if PUZZLES_LOADED_FLAG:
             self.status_label.setText("Using cached puzzle dataset...")
-            QApplication.processEvents()
+        else:
+            self.status_label.setText("Loading puzzles from Hugging Face (Parquet)...")
         
-        # Load or use cached dataset
+        # Load or use cached dataset; a missing file is downloaded behind a progress dialog
         df = self.puzzle_manager.load_puzzle_dataset()
         
         if df is not None:
@@ -627,21 +657,32 @@ class ChessPuzzleApp(QMainWindow):
             max_rating = int(self.max_rating_combo.currentText())
             
             self.status_label.setText("Processing puzzles...")
-            QApplication.processEvents()
+            for button in self.load_buttons:
+                button.setEnabled(False)
             
             # Process the dataset
-            success = self.puzzle_manager.process_puzzles_from_dataframe(min_rating, max_rating)
-            
-            if success:
-                self.status_label.setText(f"Loaded {len(self.puzzle_manager.puzzles)} puzzles")
-                self.load_next_puzzle()
-            else:
-                self.status_label.setText("Failed to process puzzles")
-                QMessageBox.warning(self, "Error", "Failed to process puzzles from dataset.")
+            run_engine_task(
+                self.puzzle_manager.process_puzzles_from_dataframe,
+                min_rating,
+                max_rating,
+                on_finished=self.puzzles_processed,
+                on_failed=lambda e: self.puzzles_processed(False)
+            )
         else:
             self.status_label.setText("Failed to load dataset")
             QMessageBox.warning(self, "Error", "Failed to load puzzle dataset from Hugging Face. Check your internet connection and make sure the polars library is installed.")
     
+    def puzzles_processed(self, success):
+        """Show the outcome of process_puzzles_from_dataframe and start the first puzzle."""
+        for button in self.load_buttons:
+            button.setEnabled(True)
+        if success:
+            self.status_label.setText(f"Loaded {len(self.puzzle_manager.puzzles)} puzzles")
+            self.load_next_puzzle()
+        else:
+            self.status_label.setText("Failed to process puzzles")
+            QMessageBox.warning(self, "Error", "Failed to process puzzles from dataset.")
+    
     def load_puzzles_from_file(self):
         """Load puzzles from a local CSV file."""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -1,9 +1,27 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QSizePolicy, QHBoxLayout, QLabel, QDialog, QTextEdit, QPushButton, QToolTip, QMenu
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QSizePolicy, QHBoxLayout, QLabel, QDialog, QTextEdit, QPushButton, QToolTip, QMenu, QGraphicsItem
+import math
+import numpy as np
 import pyqtgraph as pg
 from PySide6.QtGui import QCursor
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from dialogs import NoteDialog
 
+class MoveAxis(pg.AxisItem):
+    """
+    @brief Bottom axis that labels whole move numbers, thinned to fit the visible range.
+    """
+    def tickValues(self, minVal, maxVal, size):
+        """
+        @brief Return integer tick positions for the visible range only.
+        @param minVal Lowest visible move number.
+        @param maxVal Highest visible move number.
+        @param size Axis length in pixels.
+        @return A single [(spacing, values)] tick level.
+        """
+        step = max(1, math.ceil((maxVal - minVal) * 40 / max(size, 1)))  # about 40 px per label
+        first = math.ceil(minVal / step) * step
+        return [(step, list(range(first, int(maxVal) + 1, step)))]
+
 class EvaluationGraphPG(QWidget):
     def __init__(self, game_tab=None, parent=None):
         """
@@ -13,7 +31,7 @@ class EvaluationGraphPG(QWidget):
         """
         super().__init__(parent)
         self.game_tab = game_tab
-        self.plot_widget = pg.PlotWidget()
+        self.plot_widget = pg.PlotWidget(axisItems={'bottom': MoveAxis('bottom')})
         # Set size policy to allow resizing and a default smaller minimum size
         self.plot_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.plot_widget.setMinimumHeight(100)
@@ -26,17 +44,29 @@ class EvaluationGraphPG(QWidget):
         # Add and show the legend
         self.plot_widget.addLegend(offset=(10, 7))
         self.plot_widget.plotItem.legend.setVisible(True)
-        # Set x-axis tick spacing to 1  
-        x_axis = self.plot_widget.getAxis('bottom')
-        x_axis.setTicks([[(i, str(i)) for i in range(0, 101, 1)]])
         
+        self.x_values = np.arange(1, 129, dtype=np.float64)  # Move numbers 1..N, grown on demand
         self.white_curve = self.plot_widget.plot(pen=pg.mkPen('b', width=2), name="White")
         self.black_curve = self.plot_widget.plot(pen=pg.mkPen('r', width=2), name="Black")
+        # Long games: pyqtgraph keeps the min/max per pixel column ("peak") and skips off-screen points
+        self.plot_widget.setDownsampling(auto=True, mode='peak')
+        self.plot_widget.setClipToView(True)
+        # Keep the rasterized lines between data changes, e.g. while the hover tooltip moves
+        for curve in (self.white_curve, self.black_curve):
+            curve.curve.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         
         # Add a vertical infinite line that tracks current move
         self.current_move_line = pg.InfiniteLine(pos=0, angle=90, pen=pg.mkPen('g', width=2, style=Qt.DotLine))
         self.plot_widget.addItem(self.current_move_line)
 
+        # Hover tooltips follow the latest mouse position at most once per frame
+        self.hover_pos = None
+        self.hover_move = None  # Move number in the visible tooltip
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.setInterval(16)
+        self.hover_timer.timeout.connect(self.show_hover_tooltip)
+
         # Connect signals for hover and click
         self.plot_widget.scene().sigMouseMoved.connect(self.onMouseMoved)
         self.plot_widget.scene().sigMouseClicked.connect(self.onMouseClicked)
@@ -47,19 +77,32 @@ class EvaluationGraphPG(QWidget):
         @param white_evals List of White evaluations.
         @param black_evals List of Black evaluations.
         """
-        x_white = list(range(1, len(white_evals) + 1))
-        x_black = list(range(1, len(black_evals) + 1))
-        self.white_curve.setData(x_white, white_evals)
-        self.black_curve.setData(x_black, black_evals)
+        # float64 arrays go straight into pyqtgraph without a per-element conversion
+        n = max(len(white_evals), len(black_evals))
+        if n > len(self.x_values):
+            self.x_values = np.arange(1, max(n, 2 * len(self.x_values)) + 1, dtype=np.float64)
+        self.white_curve.setData(self.x_values[:len(white_evals)], np.asarray(white_evals, dtype=np.float64))
+        self.black_curve.setData(self.x_values[:len(black_evals)], np.asarray(black_evals, dtype=np.float64))
 
     def onMouseMoved(self, pos):
         """
-        @brief Show a tooltip with the x index when hovering over the graph.
+        @brief Schedule the hover tooltip for the latest mouse position.
         @param pos QPointF from the scene.
         """
+        self.hover_pos = pos
+        if not self.hover_timer.isActive():
+            self.hover_timer.start()
+
+    def show_hover_tooltip(self):
+        """
+        @brief Show a tooltip with the x index when hovering over the graph.
+        """
         vb = self.plot_widget.plotItem.vb
-        mousePoint = vb.mapSceneToView(pos)
-        x = int(mousePoint.x()+1)
+        mousePoint = vb.mapSceneToView(self.hover_pos)
+        x = max(1, int(round(mousePoint.x())))  # Same move a click here would go to
+        if x == self.hover_move and QToolTip.isVisible():
+            return
+        self.hover_move = x
         QToolTip.showText(QCursor.pos(), f"Move: {x}", self.plot_widget)
 
     def onMouseClicked(self, event):
@@ -71,9 +114,10 @@ class EvaluationGraphPG(QWidget):
             pos = event.scenePos()
             vb = self.plot_widget.plotItem.vb
             mousePoint = vb.mapSceneToView(pos)
-            move_index = int(mousePoint.x()+1)
-            if self.game_tab is not None:
-                self.game_tab.goto_move(move_index*2-1-1)  # Dumb way to get the move index but it works
+            if self.game_tab is not None and self.game_tab.moves:
+                # Snap to the nearest move number; move k is White's ply 2 * (k - 1)
+                move_number = max(1, int(round(mousePoint.x())))
+                self.game_tab.goto_move(min(2 * (move_number - 1), len(self.game_tab.moves) - 1))
 
     def set_current_move(self, move_number):
         """
@@ -88,16 +132,24 @@ class MoveLabel(QLabel):
         self.move_index = move_index
         self.game_tab = game_tab
         self.setStyleSheet("padding: 2px; margin: 1px;")
-        self.note = ""  # Store the note text
         # NEW properties to hold evaluation data:
         self.eval_symbol = ""  # For example: "✅", "⚠️", etc.
         self.eval_score = 0    # For example, centipawn value
 
+    @property
+    def note(self):
+        """Note text for this move, stored in the game tab's move_notes."""
+        return self.game_tab.move_notes.get(self.move_index, "")
+
+    @note.setter
+    def note(self, text):
+        self.game_tab.move_notes[self.move_index] = text
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.game_tab.goto_move(self.move_index)
         elif event.button() == Qt.RightButton:
-            self.show_context_menu(event.pos())
+            self.show_context_menu(event.position().toPoint())
     
     def show_context_menu(self, pos):
         """Show context menu with note options."""
@@ -131,28 +183,32 @@ class MoveLabel(QLabel):
         """Show dialog for editing the move note."""
         dialog = NoteDialog(self.note, self)
         if dialog.exec_() == QDialog.Accepted:
-            self.note = dialog.get_note()
-            # Save note to GameTab's persistent storage
-            self.game_tab.move_notes[self.move_index] = self.note
+            self.note = dialog.get_note()  # Saved to GameTab's persistent storage
             self.update_tooltip()
             self.update_style()
             
     def update_tooltip(self):
         """Update the tooltip to show the note if it exists."""
-        if self.note:
-            self.setToolTip(self.note)
-        else:
-            self.setToolTip("")
+        tooltip = self.note or ""
+        if tooltip != self.toolTip():
+            self.setToolTip(tooltip)
             
     def update_style(self):
         """Update the label style to indicate presence of a note."""
+        current_text = self.text().split(" 📝")[0]  # Remove existing icon if any
         if self.note:
-            current_text = self.text().split(" 📝")[0]  # Remove existing icon if any
-            self.setText(f"{current_text} 📝")  # Add note icon
-        else:
-            current_text = self.text().split(" 📝")[0]
+            current_text = f"{current_text} 📝"  # Add note icon
+        # setText repaints even when the text is the same
+        if current_text != self.text():
             self.setText(current_text)
 
+# Label styles of a MoveRow as (white label, black label)
+_STYLE_CURRENT = "background-color: rgba(255, 255, 0, 100);"
+_STYLE_PLAIN = "background-color: grey"
+HIGHLIGHT_WHITE = (_STYLE_CURRENT, _STYLE_PLAIN)
+HIGHLIGHT_BLACK = (_STYLE_PLAIN, _STYLE_CURRENT)
+HIGHLIGHT_OFF = (_STYLE_PLAIN, _STYLE_PLAIN)
+
 class MoveRow(QWidget):
     def __init__(self, move_number, white_move, white_eval, white_index, 
                  game_tab, black_move=None, black_eval=None, black_index=None, parent=None):
@@ -203,16 +259,25 @@ class MoveRow(QWidget):
         # Set auto fill background and initialize highlight off.
         self.white_label.setAutoFillBackground(True)
         self.black_label.setAutoFillBackground(True)
+        self.highlight = None  # (white style, black style) currently applied
         self.highlight_off()
 
+    def set_highlight(self, styles):
+        """
+        @brief Apply a (white, black) pair of label styles, skipping Qt's stylesheet parse if unchanged.
+        @param styles One of HIGHLIGHT_WHITE, HIGHLIGHT_BLACK or HIGHLIGHT_OFF.
+        """
+        if styles is self.highlight:
+            return
+        self.highlight = styles
+        self.white_label.setStyleSheet(styles[0])
+        self.black_label.setStyleSheet(styles[1])
+
     def highlight_white(self):
-        self.white_label.setStyleSheet("background-color: rgba(255, 255, 0, 100);")
-        self.black_label.setStyleSheet("background-color: grey")
+        self.set_highlight(HIGHLIGHT_WHITE)
 
     def highlight_black(self):
-        self.white_label.setStyleSheet("background-color: grey")
-        self.black_label.setStyleSheet("background-color: rgba(255, 255, 0, 100);")
+        self.set_highlight(HIGHLIGHT_BLACK)
 
     def highlight_off(self):
-        self.white_label.setStyleSheet("background-color: grey")
-        self.black_label.setStyleSheet("background-color: grey")
+        self.set_highlight(HIGHLIGHT_OFF)
@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+import chess
+import chess.svg
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from PySide6.QtCore import QByteArray, Qt
+from PySide6.QtGui import QGuiApplication, QImage, QPainter
+from PySide6.QtSvg import QSvgRenderer
+from board_svg import compact_svg
+
+app = QGuiApplication.instance() or QGuiApplication([])
+
+
+def rasterize(svg_str, size=480):
+    image = QImage(size, size, QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    QSvgRenderer(QByteArray(svg_str.encode("utf-8"))).render(painter)
+    painter.end()
+    return image
+
+
+class CompactSvgTest(unittest.TestCase):
+    def test_compaction_is_pixel_identical(self):
+        board = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4")
+        svg_str = chess.svg.board(
+            board,
+            lastmove=chess.Move.from_uci("g8f6"),
+            check=chess.E8,
+            arrows=[chess.svg.Arrow(chess.H5, chess.F7, color="#cc0000cc")],
+            squares=[chess.F7],
+        )
+        self.assertEqual(rasterize(compact_svg(svg_str)), rasterize(svg_str))
+
+
+if __name__ == "__main__":
+    unittest.main()
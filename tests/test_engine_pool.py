@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+import chess
+import chess.engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from engine_pool import EnginePool
+
+
+class FakeEngine:
+    """Stands in for chess.engine.SimpleEngine; raises the queued errors in order."""
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def analyse(self, board, limit, multipv=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"score": chess.engine.PovScore(chess.engine.Cp(0), chess.WHITE)}
+
+
+class EnginePoolTest(unittest.TestCase):
+    def test_engine_error_returns_engine_to_pool(self):
+        engine = FakeEngine([chess.engine.EngineError("bad position")])
+        pool = EnginePool(engines=[engine])
+        try:
+            limit = chess.engine.Limit(time=0.01)
+            with self.assertRaises(chess.engine.EngineError):
+                pool.submit(chess.Board(), limit).result(timeout=5)
+            # The engine is idle again, so the next search is served instead of blocking
+            self.assertIn("score", pool.submit(chess.Board(), limit).result(timeout=5))
+            self.assertEqual(engine.calls, 2)
+        finally:
+            pool.quit()
+
+    def test_on_info_error_returns_engine_to_pool(self):
+        engine = FakeEngine()
+        pool = EnginePool(engines=[engine])
+
+        def failing_stream(*args):
+            raise ValueError("on_info failed")
+
+        pool._stream = failing_stream
+        try:
+            limit = chess.engine.Limit(time=0.01)
+            with self.assertRaises(ValueError):
+                pool.submit(chess.Board(), limit, on_info=print).result(timeout=5)
+            self.assertIn("score", pool.submit(chess.Board(), limit).result(timeout=5))
+        finally:
+            pool.quit()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from puzzleplayer import PuzzleManager
+
+PUZZLE_CSV = (
+    "PuzzleId,FEN,Moves,Rating,RatingDeviation,Popularity,NbPlays,Themes\n"
+    "00008,r6k/pp2r2p/4Rp1Q/3p4/8/1N1P2R1/PqP2bPP/7K b - - 0 24,f2g3 e6e7 b2b1 b3c1 b1c1 h6c1,1913,75,94,6230,crushing hangingPiece long middlegame\n"
+    "0000D,5rk1/1p3ppp/pq3b2/8/8/1P1Q1N2/P4PPP/3R2K1 w - - 2 27,d3d6 f8d8 d6d8 f6d8,1452,74,96,31520,\n"
+)
+
+
+class LoadPuzzlesFromFileTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w", newline="") as f:
+            f.write(PUZZLE_CSV)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_ids_stay_text_and_empty_themes_load(self):
+        manager = PuzzleManager()
+        self.assertTrue(manager.load_puzzles_from_file(self.path))
+        puzzles = {puzzle['id']: puzzle for puzzle in manager.puzzles}
+        self.assertEqual(sorted(puzzles), ["00008", "0000D"])
+        self.assertEqual(puzzles["00008"]['rating'], 1913)
+        self.assertEqual(puzzles["00008"]['themes'], ["crushing", "hangingPiece", "long", "middlegame"])
+        self.assertEqual(puzzles["0000D"]['themes'], [])
+        self.assertEqual(len(puzzles["0000D"]['moves']), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()